@@ -0,0 +1,187 @@
+"""Summary: This file contains the class AssetCache which loads every image used by the game exactly once.
+Images are decoded from disk the first time they are asked for and every later request for the same
+path (and scale) is served from memory, so drawing, recoloring cells and checking answers never touch the disk.
+Buttons get their resized images from the cache too (AssetCache.scaled), so all the cells of a color share one surface
+and recoloring a cell only swaps which shared surface its button points to.
+It also contains the class TextCache which holds every font once and keeps the most recently rendered pieces of text.
+Both caches can be used from the thread that gets the next level ready (see Game._prepare_level), each holds a lock
+while it looks up or makes a surface."""
+
+import os
+import threading
+from collections import OrderedDict
+import pygame
+from profiler import profiler
+
+
+class AssetCache:
+    """Class that keeps decoded pygame surfaces keyed by (path, scale) and counts how often it is used"""
+    def __init__(self):
+        self._surfaces = {} # (path, scale) -> surface
+        self._scaled = {} # (id of a surface, scale) -> (surface, resized surface), the surface is kept so its id stays unique
+        self.requests = {} # (path, scale) or (id, scale) -> number of times the surface was handed out
+        self.hits = 0 # requests served from memory
+        self.misses = 0 # requests that had to decode or rescale an image
+        self.bytes_read = 0 # bytes read from disk, only grows on a miss
+        self._lock = threading.Lock()
+
+    def image(self, path, scale = 1):
+        """returns the surface for the image at path, resized by scale.
+        Each (path, scale) pair is decoded and resized once, later calls return the same surface"""
+        with self._lock:
+            return self._image(path, scale)
+
+    def _image(self, path, scale):
+        key = (_normalize(path), scale)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        self.misses += 1
+        original = self._surfaces.get((key[0], 1))
+        if original is None: # full size copies are only kept when they are asked for, the info pages alone are 30MB each
+            original = self._decode(key[0])
+        if scale == 1:
+            surface = original
+        else:
+            surface = pygame.transform.scale(original, (int(original.get_width()*scale), int(original.get_height()*scale)))
+            profiler.count("surfaces scaled")
+        self._surfaces[key] = surface
+        return surface
+
+    def scaled(self, surface, scale):
+        """returns surface resized by scale. Every caller asking for the same surface and scale gets the same
+        resized surface, so it must not be drawn on"""
+        if scale == 1:
+            return surface
+        with self._lock:
+            return self._scale(surface, scale)
+
+    def _scale(self, surface, scale):
+        key = (id(surface), scale)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        found = self._scaled.get(key)
+        if found is not None:
+            self.hits += 1
+            return found[1]
+        self.misses += 1
+        resized = pygame.transform.scale(surface, (int(surface.get_width()*scale), int(surface.get_height()*scale)))
+        profiler.count("surfaces scaled")
+        self._scaled[key] = (surface, resized)
+        return resized
+
+    def _decode(self, path):
+        """reads an image from disk, the only place in the game where that happens"""
+        self.bytes_read += os.path.getsize(path)
+        profiler.count("images loaded")
+        with profiler.phase("image load"):
+            return pygame.image.load(path).convert_alpha()
+
+    def preload(self, paths, scale = 1):
+        """loads a group of images up front so that the first frame doesn't have to"""
+        for path in paths:
+            self.image(path, scale)
+
+    def clear(self):
+        """forgets every surface, the next request for each image reads it from disk again"""
+        self._surfaces.clear()
+        self._scaled.clear()
+        self.requests.clear()
+
+    def stats(self):
+        """returns a dictionary with the cache counters and the memory held by the cached surfaces"""
+        return {"hits": self.hits, "misses": self.misses, "bytes_read": self.bytes_read,
+                "images": len(self._surfaces), "scaled": len(self._scaled),
+                "surface_bytes": sum(size for _, _, size, _ in self.memory())}
+
+    def memory(self):
+        """returns a list of (name, (width, height), bytes, times handed out) for every surface held, biggest first"""
+        names = {id(surface): f"{path} x{scale:g}" for (path, scale), surface in self._surfaces.items()}
+        held = [(names[id(surface)], surface, self.requests.get(key, 0)) for key, surface in self._surfaces.items()]
+        for (source, scale), (original, resized) in self._scaled.items():
+            name = names.get(source, f"surface {source:#x}")
+            held.append((f"{name} x{scale:g}", resized, self.requests.get((source, scale), 0)))
+        report = [(name, surface.get_size(), _surface_bytes(surface), requests) for name, surface, requests in held]
+        report.sort(key = lambda item: -item[2])
+        return report
+
+    def memory_report(self):
+        """returns the surface memory as lines of text, see memory"""
+        report = self.memory()
+        lines = [f"{size/1024:10.1f} KB  {width:5}x{height:<5} {requests:6} uses  {name}"
+                 for name, (width, height), size, requests in report]
+        lines.append(f"{sum(size for _, _, size, _ in report)/1024/1024:10.2f} MB in {len(report)} surfaces")
+        return lines
+
+
+def _surface_bytes(surface):
+    # memory of the pixels of a surface
+    return surface.get_pitch() * surface.get_height()
+
+
+def _normalize(path):
+    # the game used both "Images/" and "images/", which only work as the same folder on case insensitive file systems
+    path = path.replace("\\", "/")
+    if path.startswith("Images/"):
+        path = "images/" + path[len("Images/"):]
+    return path
+
+
+class TextCache:
+    """Class that loads each font once and keeps a bounded number of rendered text surfaces,
+    dropping the least recently used one when it is full"""
+    def __init__(self, max_surfaces = 512):
+        self.max_surfaces = max_surfaces
+        self._fonts = {} # (font file, size) -> pygame font, None is pygame's default font
+        self._surfaces = OrderedDict() # (font file, size, text, color) -> surface, oldest first
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock() # a font can't render on two threads at once
+
+    def font(self, name, size):
+        """returns the font loaded from the file name (or the default font if name is None) at the given size"""
+        key = (name, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is None:
+                font = pygame.font.Font(name, size)
+                self._fonts[key] = font
+            return font
+
+    def render(self, name, size, text, color = (0, 0, 0)):
+        """returns the surface of the text written in the given font, size and color.
+        The surface is shared, so it must not be drawn on"""
+        with self._lock:
+            return self._render(name, size, text, color)
+
+    def _render(self, name, size, text, color):
+        key = (name, size, text, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        profiler.count("text surfaces")
+        with profiler.phase("text render"):
+            surface = self.font(name, size).render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_surfaces:
+            self._surfaces.popitem(last = False)
+        return surface
+
+    def clear(self):
+        """forgets every rendered surface, fonts are kept"""
+        self._surfaces.clear()
+
+    def stats(self):
+        """returns a dictionary with the cache counters and its hit rate"""
+        requests = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / requests if requests else 0.0,
+                "surfaces": len(self._surfaces), "fonts": len(self._fonts)}
+
+
+# caches shared by the whole game
+images = AssetCache()
+texts = TextCache()
@@ -0,0 +1,271 @@
+"""Summary: This file times the parts of the game that have to stay fast, without opening a window.
+It runs the game with the dummy video driver and measures loading the levels (from the json files and from level
+packs), drawing a frame of a level, checking the answers and changing the color of a cell, both on the built in
+levels and on synthetic levels of bigger grids, as well as recording telemetry and summing up thousands of sessions. The results are written to a json file, and can be compared with
+the results of an earlier run to catch slowdowns.
+
+usage: python benchmark.py [-o results.json] [--baseline old.json] [--threshold 1.25] [--sizes 5 10 25 50]
+                           [--repeat 15] [--only NAME ...]"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # set before pygame is imported by the game
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from engine import Engine, open_levels
+from levelpack import LevelPack, write_pack
+from levels import CellRecord, LevelRecord, read_levels, read_answers, write_json
+import telemetry
+
+
+# colors with images in the game, the paths of the synthetic levels use them in turn
+GAME_COLORS = ["Dark Blue", "Green", "Light Blue", "Medium Blue", "Orange", "Pink", "Red", "Yellow"]
+SYNTHETIC_LEVELS = 50 # levels in each synthetic pack
+TELEMETRY_SESSIONS = 5000 # sessions in the synthetic telemetry file
+
+
+def synthetic_level(size, rng, game_colors = False):
+    """returns a (LevelRecord, answer) of a size x size grid where every row is a path, spelling a random word from its
+    first cell to its last. With game_colors the rows take turns with the 8 colors the game can draw (so colors repeat
+    and the level can't be solved), otherwise each row has its own color and the answer is a solution"""
+    cells = []
+    answer = []
+    for i in range(size):
+        color = GAME_COLORS[i % len(GAME_COLORS)] if game_colors else f"Color {i}"
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(size))
+        row = [CellRecord(" ", "Default", True, True) for _ in range(size)]
+        row[0] = CellRecord(word[0].upper(), color, False, False)
+        row[-1] = CellRecord(" ", color, True, False)
+        cells.append(tuple(row))
+        answer.append(tuple((letter, color) for letter in word))
+    return LevelRecord("Synthetic", tuple(cells)), tuple(answer)
+
+
+def run(function, repeat, setup = None):
+    """runs function repeat times and returns its timings in seconds, setup makes the argument of each run, untimed"""
+    times = []
+    for _ in range(repeat):
+        argument = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        function(*argument)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+class Suite:
+    """Class that runs the benchmarks and keeps their timings"""
+    def __init__(self, repeat, sizes, only = None):
+        self.repeat = repeat
+        self.sizes = sizes
+        self.only = only # names (or beginnings of names) of the benchmarks to run, all of them if None
+        self.results = {}
+        self.rng = random.Random(1)
+        self.folder = tempfile.mkdtemp(prefix = "word-flow-bench-")
+        self.game = None
+
+    def wanted(self, name):
+        return self.only is None or any(name.startswith(prefix) for prefix in self.only)
+
+    def time(self, name, function, setup = None, repeat = None):
+        """times function under name, if it was asked for"""
+        if not self.wanted(name):
+            return
+        times = run(function, repeat or self.repeat, setup)
+        self.results[name] = {"median": statistics.median(times), "min": min(times), "runs": len(times)}
+        print(f"{name:36} median {self.results[name]['median']*1000:9.3f}ms   min {self.results[name]['min']*1000:9.3f}ms",
+              flush = True)
+
+    def run_all(self):
+        try:
+            self.loading()
+            self.engine()
+            self.frames()
+            self.telemetry()
+            for size in self.sizes:
+                self.synthetic(size)
+        finally:
+            shutil.rmtree(self.folder) # the synthetic packs and json files
+        return self.results
+
+    def loading(self):
+        self.time("load.json", lambda: (read_levels("grid.json"), read_answers("answers.json")))
+        self.time("load.pack", lambda: [LevelPack("levels.wfp").levels[index] for index in range(11)])
+        self.time("load.open_levels", open_levels)
+
+    def engine(self):
+        engine = Engine(*open_levels())
+        def wrong(): # a fresh board, checking it compares every cell
+            engine.load_level(len(engine.levels) - 1)
+            return engine
+        def solved():
+            engine.show_answers()
+            return engine
+        self.time("engine.check.wrong", Engine.check, wrong)
+        self.time("engine.check.solved", Engine.check, solved)
+        engine.load_level(len(engine.levels) - 1)
+        cell = next((i, j) for i, row in enumerate(engine.board.GetBoard()) for j, c in enumerate(row) if c.get_color_change())
+        colors = iter(["Red", "Default"] * 100000)
+        self.time("engine.set_color", lambda: engine.set_color(*cell, next(colors)), repeat = self.repeat*20)
+
+    def _game(self):
+        # one Game is made for every frame benchmark, making it loads every image
+        if self.game is None:
+            from game import Game
+            self.game = Game()
+            self.game.main_menu = False
+        return self.game
+
+    def _use_levels(self, levels, answers, index = 0):
+        game = self._game()
+        game.engine = Engine(levels, answers)
+        game.engine.load_level(index)
+        game.characters = game.build_level()
+        game.renderer.invalidate()
+        game._update_screen() # the first frame draws everything, the frames timed after it are the steady state
+
+    def _frame_benchmarks(self, suffix):
+        game = self._game()
+        self.time("frame.idle" + suffix, game._update_screen)
+        steps = iter([1, -1] * 100000) # back and forth by one cell, a grid that fits the window doesn't move
+        def scroll():
+            pitch_x, pitch_y = game.viewport.pitch()
+            step = next(steps)
+            game.scroll(step*pitch_x, step*pitch_y)
+            game._update_screen()
+        self.time("frame.scroll" + suffix, scroll)
+        grid = game.characters
+        cell = next(((i, j) for i, row in enumerate(grid) for j, c in enumerate(row) if c.get_color_change()), None)
+        if cell is None:
+            return
+        colors = iter([0, 8] * 100000) # Dark Blue, Default
+        def edit():
+            game.select_color(next(colors))
+            game.update_character_color(*cell)
+            game._update_screen()
+        self.time("frame.edit" + suffix, edit)
+        self.time("game.update_character_color" + suffix, lambda: (game.select_color(next(colors)), game.update_character_color(*cell)))
+        def wrong():
+            game.engine.load_level(game.engine.current_level)
+            game.characters = game.build_level()
+        self.time("game.check_answers" + suffix, lambda _: game.check_answers(), wrong)
+
+    def frames(self):
+        if not any(self.wanted(prefix) for prefix in ("frame", "game")):
+            return
+        levels, answers = open_levels()
+        self._use_levels(levels, answers, len(levels) - 1) # the biggest built in level
+        self._frame_benchmarks(".builtin")
+
+    def telemetry(self):
+        if not self.wanted("telemetry"):
+            return
+        path = os.path.join(self.folder, "telemetry.db")
+        log = telemetry.Telemetry(path, capacity = None)
+        self.time("telemetry.record", lambda: log.record("check", 3, 2), repeat = self.repeat*20)
+        log.close()
+        events = [] # every session plays the 11 levels, checking a few times and sometimes showing the answers
+        for session in range(TELEMETRY_SESSIONS):
+            for level in range(11):
+                events.append((str(session), session, "start", level, None))
+                for _ in range(self.rng.randrange(1, 5)):
+                    events.append((str(session), session, "check", level, self.rng.randrange(0, 6)))
+                kind = "answers" if self.rng.random() < 0.1 else "solved"
+                events.append((str(session), session, kind, level, self.rng.uniform(20, 300) if kind == "solved" else None))
+        connection = telemetry.connect(path)
+        with connection:
+            connection.executemany(telemetry.INSERT, events)
+        connection.close()
+        self.time(f"telemetry.summarize.{TELEMETRY_SESSIONS}", lambda: telemetry.summarize(path))
+
+    def synthetic(self, size):
+        suffix = f".{size}x{size}"
+        made = [synthetic_level(size, self.rng) for _ in range(SYNTHETIC_LEVELS)]
+        levels = [level for level, _ in made]
+        answers = [answer for _, answer in made]
+        pack = os.path.join(self.folder, f"synthetic{size}.wfp")
+        grid_file = os.path.join(self.folder, f"grid{size}.json")
+        answers_file = os.path.join(self.folder, f"answers{size}.json")
+        write_pack(pack, levels, answers)
+        write_json(levels, answers, grid_file, answers_file)
+        self.time("load.json" + suffix, lambda: (read_levels(grid_file), read_answers(answers_file)))
+        self.time("load.pack" + suffix, lambda: [LevelPack(pack).levels[index] for index in range(len(levels))])
+
+        engine = Engine(levels, answers)
+        self.time("engine.check.wrong" + suffix, Engine.check, lambda: (engine.load_level(0), engine)[1])
+        self.time("engine.check.solved" + suffix, Engine.check, lambda: (engine.show_answers(), engine)[1])
+        engine.load_level(0)
+        colors = iter(["Color 0", "Default"] * 100000)
+        self.time("engine.set_color" + suffix, lambda: engine.set_color(0, 1, next(colors)), repeat = self.repeat*20)
+
+        if any(self.wanted(prefix) for prefix in ("frame", "game")):
+            drawn = [synthetic_level(size, self.rng, game_colors = True) for _ in range(2)]
+            self._use_levels([level for level, _ in drawn], [answer for _, answer in drawn])
+            self._frame_benchmarks(suffix)
+
+
+def environment():
+    """returns a description of the machine and versions the results were measured with"""
+    import pygame
+    return {"python": platform.python_version(), "pygame": pygame.version.ver, "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def compare(results, baseline, threshold):
+    """prints the change of every benchmark against the baseline, returns the names of the ones slower than threshold"""
+    slower = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:36} new")
+            continue
+        ratio = result["median"] / baseline[name]["median"] if baseline[name]["median"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag = "  SLOWER"
+            slower.append(name)
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        print(f"{name:36} {baseline[name]['median']*1000:9.3f}ms -> {result['median']*1000:9.3f}ms  ({ratio:5.2f}x){flag}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Time loading, drawing and checking levels without a window")
+    parser.add_argument("-o", "--output", default = "benchmark.json", help = "json file the results are written to")
+    parser.add_argument("--baseline", help = "results of an earlier run to compare with")
+    parser.add_argument("--threshold", type = float, default = 1.25, help = "slowdown (new / old median) reported as a regression")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [5, 10, 25, 50], help = "sizes of the synthetic grids")
+    parser.add_argument("--repeat", type = int, default = 15, help = "runs of each benchmark")
+    parser.add_argument("--only", nargs = "+", help = "only run the benchmarks whose names start with these")
+    args = parser.parse_args()
+    # the paths given are relative to where the command was run, not to the game's folder
+    args.output = os.path.abspath(args.output)
+    if args.baseline:
+        args.baseline = os.path.abspath(args.baseline)
+    os.chdir(os.path.dirname(os.path.abspath(__file__))) # the game loads its images and levels from here
+
+    results = Suite(args.repeat, args.sizes, args.only).run_all()
+    with open(args.output, "w") as file:
+        json.dump({"environment": environment(), "results": results}, file, indent = 4)
+    print(f"wrote {len(results)} results to {args.output}")
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)["results"]
+        slower = compare(results, baseline, args.threshold)
+        if slower:
+            print(f"{len(slower)} benchmarks are more than {args.threshold:g}x slower than {args.baseline}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,69 @@
 """Author: Giuseppe Pongelupe Giacoia
 Date: 03/17/2014
 Summary: This file contains the definitions of the class Character which represents a cell in the game's level's grids
-and the class Board which represents an entire level"""
+and the class Board which represents an entire level.
+Neither class needs pygame, the button of a character is whatever object the game uses to draw it.
+A Board keeps its cells in flat typed arrays (string ids for the letters and colors, a byte of flags per cell) instead of
+one object per cell, the characters returned by GetBoard are views that read and write those arrays, so comparing,
+clearing and copying a whole board are array operations.
+Copies are copy on write: a copy shares the arrays of the board it was made from and only one of them copies the arrays
+when it changes a cell, so copying or clearing a board costs the same whatever its size and a level's first board can be
+kept untouched and copied for every new game"""
 
-from button import *
+import threading
+from array import array
 
-class Character: 
-    """Class with attributes letter, row, column"""
-    def __init__(self, letter = "", color = "white",button = "na", has_text = False, color_change = True):
-        # button is a button object
-        self._letter = letter
-        self._color = color
-        self._button = button # has changeable text
-        self._has_text = has_text
-        self._color_change = color_change # has changeable color
+DEFAULT_COLOR = "Default" # color of a cell that isn't part of any path
+
+HAS_TEXT = 1 # flag bits of a cell
+COLOR_CHANGE = 2
+
+# every letter and color is stored once and referred to by its index in _strings, the ids are shared by all boards
+_strings = []
+_string_ids = {}
+_strings_lock = threading.Lock()
+
+
+def string_id(text):
+    """returns the id of a letter or color, adding it to the table if it is new"""
+    found = _string_ids.get(text)
+    if found is None:
+        with _strings_lock: # the next level can be made on another thread, a new string must get a single id
+            found = _string_ids.get(text)
+            if found is None:
+                found = len(_strings)
+                _strings.append(text)
+                _string_ids[text] = found
+    return found
+
+
+def _folded_id(text):
+    # id of the lowercase letter, letters are compared without their case
+    return string_id(text.lower())
+
+
+_WITHOUT = {flag: bytes(0 if value & flag else 1 for value in range(256)) for flag in (HAS_TEXT, COLOR_CHANGE)}
+
+
+def _indexes_without(flags, flag):
+    # the indexes of the cells that don't have flag, found with bytes operations since they are few
+    marked = flags.translate(_WITHOUT[flag])
+    indexes = []
+    index = marked.find(1)
+    while index >= 0:
+        indexes.append(index)
+        index = marked.find(1, index + 1)
+    return indexes
+
+
+class _Cell:
+    """getter and setter methods shared by a Character and a view of a cell of a Board"""
+    __slots__ = ()
 
     # below are some simple getter and setter methods
     def get_color_change(self):
         return self._color_change
-    
+
     def get_has_text(self):
         return self._has_text
 
@@ -26,49 +71,215 @@ class Character:
         # updates the image of the button object and its color attribute
         self._button.change_image(image)
         self._color = color
-    
+
     def get_button(self):
         return self._button
-    
+
+    def set_button(self, button):
+        self._button = button
+
     def get_letter(self):
         return self._letter
-    
+
     def SetLetter(self, letter):
         self._letter = letter
 
     def GetColor(self):
         return self._color
-    
+
     def SetColor(self, color):
         self._color = color
-    
+
     # special method for comparing character objects
-    def __eq__(self, other): 
+    def __eq__(self, other):
         return self._letter.lower() == other._letter.lower() and self._color == other._color
-    
+
     def __str__(self):
         return self._letter
 
-class Board: 
+
+class Character(_Cell):
+    """Class with attributes letter, row, column"""
+    __slots__ = ["_letter", "_color", "_button", "_has_text", "_color_change"]
+
+    def __init__(self, letter = "", color = "white",button = "na", has_text = False, color_change = True):
+        # button is a button object
+        self._letter = letter
+        self._color = color
+        self._button = button # has changeable text
+        self._has_text = has_text
+        self._color_change = color_change # has changeable color
+
+
+class CharacterView(_Cell):
+    """Character of a Board, its attributes are read from and written to the board's arrays"""
+    __slots__ = ["_owner", "_index"]
+
+    def __init__(self, owner, index):
+        self._owner = owner
+        self._index = index
+
+    @property
+    def _letter(self):
+        return _strings[self._owner._letters[self._index]]
+
+    @_letter.setter
+    def _letter(self, letter):
+        owner = self._owner
+        if owner._shared:
+            owner._own()
+        owner._letters[self._index] = string_id(letter)
+        owner._folded[self._index] = _folded_id(letter)
+
+    @property
+    def _color(self):
+        return _strings[self._owner._colors[self._index]]
+
+    @_color.setter
+    def _color(self, color):
+        owner = self._owner
+        if owner._shared:
+            owner._own()
+        owner._colors[self._index] = string_id(color)
+
+    @property
+    def _has_text(self):
+        return bool(self._owner._flags[self._index] & HAS_TEXT)
+
+    @property
+    def _color_change(self):
+        return bool(self._owner._flags[self._index] & COLOR_CHANGE)
+
+    @property
+    def _button(self):
+        buttons = self._owner._buttons
+        return "na" if buttons is None else buttons[self._index]
+
+    @_button.setter
+    def _button(self, button):
+        if self._owner._buttons is None: # most boards are never drawn, they only get a list of buttons when needed
+            self._owner._buttons = ["na"] * len(self._owner._flags)
+        self._owner._buttons[self._index] = button
+
+
+class Board:
     """Class with attributes size, board and category, wordNum"""
     def __init__(self, board = [], category = "n/a"):
-        self._board = board # 2D list of character objects representing the game's level grid
         self._category = category
-    
+        self.SetBoard(board)
+
+    @classmethod
+    def from_cells(cls, cells, category = "n/a"):
+        """makes a board from rows of (letter, color, has_text, color_change) tuples, such as the cells of a LevelRecord,
+        without making a Character for each cell"""
+        board = cls([], category)
+        board._fill([cell for row in cells for cell in row], len(cells), len(cells[0]) if cells else 0)
+        return board
+
+    def _fill(self, cells, rows, columns):
+        # cells is a flat list of (letter, color, has_text, color_change) in row order
+        self._rows = rows
+        self._columns = columns
+        self._letters = array("I", [string_id(cell[0]) for cell in cells])
+        self._folded = array("I", [_folded_id(cell[0]) for cell in cells])
+        self._colors = array("I", [string_id(cell[1]) for cell in cells])
+        self._flags = bytearray((HAS_TEXT if cell[2] else 0) | (COLOR_CHANGE if cell[3] else 0) for cell in cells)
+        self._buttons = None
+        self._views = None
+        self._cleared = [None] # arrays of the cleared board, made by the first clear of this board or of any of its copies
+        self._shared = False # True while the letter and color arrays may be used by another board too
+
+    def _own(self):
+        # copies the arrays shared with other boards before a cell is changed, the flags are never changed so they stay shared
+        self._letters = array("I", self._letters)
+        self._folded = array("I", self._folded)
+        self._colors = array("I", self._colors)
+        self._shared = False
+
     def GetBoard(self):
         """returns the board"""
-        return self._board
-    
+        if self._views is None: # the same views are returned every time, so they can be kept and compared
+            columns = self._columns
+            self._views = [[CharacterView(self, i*columns + j) for j in range(columns)] for i in range(self._rows)]
+        return self._views
+
     def GetCategory(self):
         """returns the category"""
         return self._category
-    
+
     def SetBoard(self, board):
         """sets the board"""
-        self._board = board
+        cells = [(character.get_letter(), character.GetColor(), character.get_has_text(), character.get_color_change())
+                 for row in board for character in row]
+        self._fill(cells, len(board), len(board[0]) if board else 0)
+        buttons = [character.get_button() for row in board for character in row]
+        if any(button != "na" for button in buttons):
+            self._buttons = buttons
 
     def SetCategory(self, category):
         """sets the category"""
         self._category = category
 
-        
+    def size(self):
+        """returns (rows, columns)"""
+        return self._rows, self._columns
+
+    def matches(self, other):
+        """returns True if every cell has the same letter (in any case) and color as the cell of other"""
+        return self._folded == other._folded and self._colors == other._colors
+
+    def differences(self, other):
+        """returns the (row, column) of the cells whose letter (in any case) or color differ from the cell of other"""
+        if self.matches(other):
+            return []
+        columns = self._columns
+        return [divmod(index, columns) for index, (letter, other_letter, color, other_color)
+                in enumerate(zip(self._folded, other._folded, self._colors, other._colors))
+                if letter != other_letter or color != other_color]
+
+    def clear(self, cells = None):
+        """erases the letters and colors that can be changed, of every cell or of the given (row, column) list"""
+        blank = string_id(" ")
+        blank_folded = _folded_id(" ")
+        default = string_id(DEFAULT_COLOR)
+        flags = self._flags
+        if cells is None:
+            if self._cleared[0] is None:
+                # the cleared board is the same every time since the cells that can't be changed never are,
+                # so it is made once (putting back the few ends of the paths) and then shared by every copy
+                letters = array("I", [blank]) * len(flags)
+                folded = array("I", [blank_folded]) * len(flags)
+                colors = array("I", [default]) * len(flags)
+                for index in _indexes_without(flags, HAS_TEXT):
+                    letters[index] = self._letters[index]
+                    folded[index] = self._folded[index]
+                for index in _indexes_without(flags, COLOR_CHANGE):
+                    colors[index] = self._colors[index]
+                self._cleared[0] = (letters, folded, colors)
+            self._letters, self._folded, self._colors = self._cleared[0]
+            self._shared = True
+            return
+        if self._shared:
+            self._own()
+        for i, j in cells:
+            index = i*self._columns + j
+            if flags[index] & HAS_TEXT: # the given letters at the start of the words are never erased
+                self._letters[index] = blank
+                self._folded[index] = blank_folded
+            if flags[index] & COLOR_CHANGE:
+                self._colors[index] = default
+
+    def copy(self):
+        """returns a new board with the same cells (but no buttons), sharing this board's arrays until either changes a cell"""
+        board = Board([], self._category)
+        board._rows = self._rows
+        board._columns = self._columns
+        board._letters = self._letters
+        board._folded = self._folded
+        board._colors = self._colors
+        board._flags = self._flags
+        board._buttons = None
+        board._views = None
+        board._cleared = self._cleared # the same list, a copy's first clear makes the arrays for this board too
+        board._shared = self._shared = True
+        return board
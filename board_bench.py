@@ -0,0 +1,121 @@
+"""Summary: This file measures the memory and speed of the Board storage.
+It compares a grid of one object per cell (with an instance __dict__, like Character used to be, and with __slots__)
+against a Board that keeps its cells in arrays, reporting the bytes used per cell and the time taken to compare,
+clear and copy a whole board. The cleared arrays of a board are made by its first clear and shared by every board
+copied from it, the engine makes them when it first loads a level, so "clear" is what clearing a board of a level costs
+and "first clear" is paid once per level.
+
+usage: python board_bench.py [--size 100] [--repeat 20]"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from board import Board, Character, DEFAULT_COLOR
+
+
+COLORS = ["Red", "Orange", "Yellow", "Green", "Light Blue", "Medium Blue", "Dark Blue", "Pink", DEFAULT_COLOR]
+
+
+class DictCharacter:
+    """a cell stored the way Character was before it had __slots__"""
+    def __init__(self, letter, color, button, has_text, color_change):
+        self._letter = letter
+        self._color = color
+        self._button = button
+        self._has_text = has_text
+        self._color_change = color_change
+
+
+def random_cells(size, rng):
+    """returns size x size rows of (letter, color, has_text, color_change)"""
+    return [[(rng.choice("abcdefghijklmnopqrstuvwxyz "), rng.choice(COLORS), rng.random() < 0.9, rng.random() < 0.8)
+             for _ in range(size)] for _ in range(size)]
+
+
+def bytes_per_cell(make, size):
+    """returns the memory allocated by make() divided by the number of cells"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = make()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used / (size*size)
+
+
+def best_time(function, repeat, setup = None):
+    """returns the fastest of repeat runs of function, in seconds. setup makes the argument of each run, untimed"""
+    best = None
+    for _ in range(repeat):
+        argument = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        function(*argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _compare_objects(grid, other):
+    return [(i, j) for i in range(len(grid)) for j in range(len(grid[i]))
+            if grid[i][j]._letter.lower() != other[i][j]._letter.lower() or grid[i][j]._color != other[i][j]._color]
+
+
+def _clear_objects(grid):
+    for row in grid:
+        for character in row:
+            if character._has_text:
+                character._letter = " "
+            if character._color_change:
+                character._color = DEFAULT_COLOR
+
+
+def _copy_objects(grid):
+    return [[Character(c._letter, c._color, "na", c._has_text, c._color_change) for c in row] for row in grid]
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Measure the memory and speed of the Board storage")
+    parser.add_argument("--size", type = int, default = 100, help = "rows and columns of the boards")
+    parser.add_argument("--repeat", type = int, default = 20)
+    parser.add_argument("--seed", type = int, default = 1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    size = args.size
+    cells = random_cells(size, rng)
+    other_cells = [list(row) for row in cells]
+    other_cells[size//2][size//2] = ("?", "Red", True, True) # one difference, so nothing stops early
+
+    print(f"memory per cell ({size}x{size}):")
+    layouts = [("objects with __dict__", lambda: [[DictCharacter(*cell[:2], "na", *cell[2:]) for cell in row] for row in cells]),
+               ("objects with __slots__", lambda: [[Character(*cell[:2], "na", *cell[2:]) for cell in row] for row in cells]),
+               ("Board arrays", lambda: Board.from_cells(cells))]
+    for name, make in layouts:
+        print(f"  {name:24} {bytes_per_cell(make, size):7.1f} bytes")
+
+    objects = [[Character(*cell[:2], "na", *cell[2:]) for cell in row] for row in cells]
+    other_objects = [[Character(*cell[:2], "na", *cell[2:]) for cell in row] for row in other_cells]
+    board = Board.from_cells(cells)
+    other_board = Board.from_cells(other_cells)
+    same_board = board.copy()
+    board.copy().clear() # as the engine does with the first board of a level
+    print(f"whole board operations ({size}x{size}, best of {args.repeat}):")
+    results = [
+        ("compare", best_time(lambda: _compare_objects(objects, other_objects), args.repeat),
+                    best_time(lambda: board.differences(other_board), args.repeat)),
+        ("compare equal", best_time(lambda: _compare_objects(objects, objects), args.repeat),
+                          best_time(lambda: board.matches(same_board), args.repeat)),
+        ("copy", best_time(lambda: _copy_objects(objects), args.repeat), best_time(board.copy, args.repeat)),
+        ("clear", best_time(_clear_objects, args.repeat, lambda: _copy_objects(objects)),
+                  best_time(Board.clear, args.repeat, board.copy)), # copies share the cleared arrays
+        ("first clear", best_time(_clear_objects, args.repeat, lambda: _copy_objects(objects)),
+                        best_time(Board.clear, args.repeat, lambda: Board.from_cells(cells))),
+    ]
+    for name, object_time, board_time in results:
+        print(f"  {name:14} objects {object_time*1000:8.3f}ms   board {board_time*1000:8.3f}ms   "
+              f"({object_time/max(board_time, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,46 +3,35 @@ Date 03/17/2024
 purpose: button class using pygame in order to find a perimiter of a given image
 and detect whether or not a user has pressed it. 
 """
-import pygame
+from assets import images
 
 class Button():
     def __init__(self, x, y, image,scale,ai_game):
         #resize image based on scale
         self.screen = ai_game.screen
+        self.game = ai_game # the game collects the clicks made in each frame
 
-        width = image.get_width()
-        height = image.get_height()
         self.scale = scale
-        self.image = pygame.transform.scale(image,(int(width*scale),int(height*scale)))
+        self.image = images.scaled(image, scale) # shared with every button showing the same image at the same scale
         #positions the image
         self.rect = self.image.get_rect()
         self.rect.center = (x,y)
-        
-        #every button starts unclicked
-        self.clicked = False
     
-    def change_image(self,image): # Replace the button's image
-        self.image = pygame.transform.scale(image,(int(image.get_width()*self.scale),int(image.get_height()*self.scale)))
+    def change_image(self,image): # Replace the button's image, only a lookup once the image was used at this scale
+        self.image = images.scaled(image, self.scale)
 
     def get_image(self):
         return self.image
     
-    def draw(self): 
-        action = False
-        # get position of mouse
-        pos = pygame.mouse.get_pos()
+    def is_pressed(self):
+        """checks if a left click landed on the button since the last frame, without drawing it"""
+        for pos in self.game.clicks:
+            if self.rect.collidepoint(pos):
+                return True
+        return False
 
-        # Check mouseover and clicked conditions
-        if self.rect.collidepoint(pos):
-            # 0  is left click 1 is middle mouse button and 2 is right mouse button
-            if pygame.mouse.get_pressed()[0] == 1 and self.clicked == False:
-                # this variable allows it to only register one click at a time
-                self.clicked = True
-                action = True
-
-        # If mouse isn't pressed it unclicks the mouse
-        if pygame.mouse.get_pressed()[0] ==0:
-            self.clicked = False
+    def draw(self): 
+        action = self.is_pressed()
 
         # draw button on screen
         self.screen.blit(self.image,(self.rect.x,self.rect.y))
@@ -0,0 +1,35 @@
+"""Summary: This file contains the class ClickMap which finds what was clicked without testing every button.
+The rectangles of the cells and controls of a screen are put in the squares of a coarse grid (a spatial hash) that they
+overlap, so a click only has to be tested against the one or two rectangles in its square, however many cells the
+level has. It doesn't draw anything and only needs rectangles with collidepoint, like pygame.Rect."""
+
+
+class ClickMap:
+    """Class that maps screen positions to the targets (cells, buttons or any other object) whose rectangle holds them"""
+    def __init__(self, bucket_size = 64):
+        self.bucket_size = bucket_size # side of the squares of the hash, about the size of a cell works best
+        self._buckets = {} # (column, row) of a square -> list of (rect, target)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self._buckets = {}
+        self._count = 0
+
+    def add(self, rect, target):
+        """makes target the result of clicks inside rect, the first target added wins where rectangles overlap"""
+        size = self.bucket_size
+        for column in range(int(rect.left // size), int((rect.right - 1) // size) + 1):
+            for row in range(int(rect.top // size), int((rect.bottom - 1) // size) + 1):
+                self._buckets.setdefault((column, row), []).append((rect, target))
+        self._count += 1
+
+    def find(self, pos):
+        """returns the target under pos, or None if nothing was clicked"""
+        x, y = pos
+        for rect, target in self._buckets.get((int(x // self.bucket_size), int(y // self.bucket_size)), ()):
+            if rect.collidepoint(pos):
+                return target
+        return None
@@ -0,0 +1,246 @@
+"""Summary: This file contains the word lists of the categories, compiled into a DAWG (a trie whose equal endings are
+shared) so a category with hundreds of thousands of words loads in a moment and takes little memory.
+The lists are text files with one word per line in the "words" folder, named after their category ("Disney Characters"
+is words/disney_characters.txt), and are compiled into a ".dawg" file next to them. A compiled file has a header, the
+index of the first edge of every node, the node each edge leads to, the letter of each edge and a byte per node that
+is 1 for the end of a word. Dictionary maps the file with mmap and walks it one letter at a time, which is what the
+engine does to read the letters along a path.
+
+usage: python dictionary.py build [words/animals.txt ...]
+       python dictionary.py lookup CATEGORY WORD [WORD ...]
+       python dictionary.py info [CATEGORY ...]"""
+
+import argparse
+import glob
+import mmap
+import os
+import re
+import struct
+import warnings
+from functools import lru_cache
+
+
+MAGIC = b"WFDW"
+VERSION = 1
+# magic, version, number of nodes, number of edges
+HEADER = struct.Struct("<4sHxxII")
+WORDS_FOLDER = "words"
+NO_NODE = -1
+
+
+def normalize(word):
+    """returns the word as it is stored: lowercase letters only, "Chick-fil-A" is "chickfila" """
+    return "".join(letter for letter in word.lower() if "a" <= letter <= "z")
+
+
+def file_name(category):
+    """returns the name of the word list of a category, without its extension"""
+    return re.sub(r"[^a-z0-9]+", "_", category.lower()).strip("_")
+
+
+def read_words(path):
+    """returns the sorted, normalized words of a text file with one word per line"""
+    with open(path, "r") as file:
+        return sorted({normalize(line) for line in file if normalize(line)})
+
+
+class _Node:
+    # a node of the automaton while it is being built
+    __slots__ = ["edges", "final"]
+
+    def __init__(self):
+        self.edges = {} # letter -> _Node
+        self.final = False
+
+    def key(self):
+        # two nodes with the same key accept the same endings, children are already unique so their ids can be used
+        return (self.final, tuple((letter, id(child)) for letter, child in sorted(self.edges.items())))
+
+
+def compile_words(words, path):
+    """writes the DAWG of words (any order, normalized or not) to path, returns (number of nodes, number of edges)"""
+    words = sorted({normalize(word) for word in words if normalize(word)})
+    root = _Node()
+    register = {} # key -> the one node kept for it
+    unchecked = [] # (parent, letter, child) of the last word that may still be merged with the register
+
+    def minimize(down_to):
+        while len(unchecked) > down_to:
+            parent, letter, child = unchecked.pop()
+            key = child.key()
+            if key in register:
+                parent.edges[letter] = register[key]
+            else:
+                register[key] = child
+
+    previous = ""
+    for word in words: # words are sorted so a node can be minimized once no later word goes through it
+        common = 0
+        while common < min(len(word), len(previous)) and word[common] == previous[common]:
+            common += 1
+        minimize(common)
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common:]:
+            child = _Node()
+            node.edges[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.final = True
+        previous = word
+    minimize(0)
+
+    # numbers the nodes breadth first from the root, so the root is node 0
+    ids = {id(root): 0}
+    order = [root]
+    for node in order:
+        for letter in sorted(node.edges):
+            child = node.edges[letter]
+            if id(child) not in ids:
+                ids[id(child)] = len(order)
+                order.append(child)
+    first_edge = [0]
+    targets = []
+    letters = bytearray()
+    for node in order:
+        for letter in sorted(node.edges):
+            targets.append(ids[id(node.edges[letter])])
+            letters.append(ord(letter))
+        first_edge.append(len(targets))
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(order), len(targets)))
+        file.write(struct.pack(f"<{len(first_edge)}I", *first_edge))
+        file.write(struct.pack(f"<{len(targets)}I", *targets))
+        file.write(bytes(letters))
+        file.write(bytes(1 if node.final else 0 for node in order))
+    return len(order), len(targets)
+
+
+class Dictionary:
+    """Class that looks up words in a compiled DAWG file.
+    A walk starts at root and moves with step, a node is NO_NODE once no word starts with the letters given"""
+    root = 0
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, self.nodes, self.edges = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled word list")
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} word list, only version {VERSION} can be read")
+        position = HEADER.size
+        self._first_edge = memoryview(self._map)[position:position + 4*(self.nodes + 1)].cast("I")
+        position += 4*(self.nodes + 1)
+        self._targets = memoryview(self._map)[position:position + 4*self.edges].cast("I")
+        position += 4*self.edges
+        self._letters = position # the letters are searched in the map itself
+        self._final = position + self.edges
+
+    def step(self, node, letter):
+        """returns the node reached from node with letter, or NO_NODE"""
+        if node == NO_NODE or len(letter) != 1: # an erased cell has no letter, it must not match the first edge
+            return NO_NODE
+        start = self._first_edge[node]
+        found = self._map.find(letter.encode(), self._letters + start, self._letters + self._first_edge[node + 1])
+        if found < 0:
+            return NO_NODE
+        return self._targets[found - self._letters]
+
+    def is_word(self, node):
+        """returns True if the letters that led to node are a word"""
+        return node != NO_NODE and self._map[self._final + node] == 1
+
+    def walk(self, letters, node = 0):
+        """returns the node reached by the letters from node (the root by default)"""
+        for letter in letters:
+            node = self.step(node, letter)
+            if node == NO_NODE:
+                break
+        return node
+
+    def has_prefix(self, prefix):
+        """returns True if a word starts with prefix"""
+        return self.walk(normalize(prefix)) != NO_NODE
+
+    def __contains__(self, word):
+        return self.is_word(self.walk(normalize(word)))
+
+    def __iter__(self):
+        """yields the words in alphabetical order"""
+        stack = [(self.root, "")]
+        while stack:
+            node, letters = stack.pop()
+            if self.is_word(node):
+                yield letters
+            children = []
+            for edge in range(self._first_edge[node], self._first_edge[node + 1]):
+                children.append((self._targets[edge], letters + chr(self._map[self._letters + edge])))
+            stack.extend(reversed(children))
+
+    def size(self):
+        """returns the number of bytes of the compiled file"""
+        return len(self._map)
+
+    def close(self):
+        self._first_edge.release()
+        self._targets.release()
+        self._map.close()
+
+
+def compiled_path(text_path):
+    """returns the path of the compiled form of a word list"""
+    return os.path.splitext(text_path)[0] + ".dawg"
+
+
+@lru_cache(maxsize = None)
+def for_category(category, folder = WORDS_FOLDER):
+    """returns the Dictionary of a category, shared by every level of that category, or None if it has no compiled word list.
+    The lists are only compiled by "python dictionary.py build", compiling a big list takes seconds and this is called
+    while the game is played, so a list edited since it was compiled only gets a warning"""
+    text_path = os.path.join(folder, file_name(category) + ".txt")
+    path = compiled_path(text_path)
+    if not os.path.exists(path):
+        if os.path.exists(text_path):
+            warnings.warn(f"{text_path} isn't compiled, run python dictionary.py build {text_path}")
+        return None
+    if os.path.exists(text_path) and os.path.getmtime(text_path) > os.path.getmtime(path):
+        warnings.warn(f"{text_path} was edited after {path} was compiled, run python dictionary.py build {text_path}")
+    return Dictionary(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compile and query the word lists of the categories")
+    commands = parser.add_subparsers(dest = "command", required = True)
+    build = commands.add_parser("build", help = "compile word lists, every list in the words folder by default")
+    build.add_argument("lists", nargs = "*")
+    lookup = commands.add_parser("lookup", help = "check words against the list of a category")
+    lookup.add_argument("category")
+    lookup.add_argument("words", nargs = "+")
+    info = commands.add_parser("info", help = "print the size of compiled word lists")
+    info.add_argument("categories", nargs = "*")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        for text_path in args.lists or sorted(glob.glob(os.path.join(WORDS_FOLDER, "*.txt"))):
+            words = read_words(text_path)
+            nodes, edges = compile_words(words, compiled_path(text_path))
+            print(f"{text_path}: {len(words)} words, {nodes} nodes, {edges} edges")
+    elif args.command == "lookup":
+        dictionary = for_category(args.category)
+        if dictionary is None:
+            parser.error(f"no word list for {args.category!r}")
+        for word in args.words:
+            status = "word" if word in dictionary else "prefix" if dictionary.has_prefix(word) else "no"
+            print(f"{word}: {status}")
+    else:
+        paths = ([compiled_path(os.path.join(WORDS_FOLDER, file_name(category) + ".txt")) for category in args.categories]
+                 or sorted(glob.glob(os.path.join(WORDS_FOLDER, "*.dawg"))))
+        for path in paths:
+            dictionary = Dictionary(path)
+            print(f"{path}: {dictionary.nodes} nodes, {dictionary.edges} edges, {dictionary.size()} bytes")
+            dictionary.close()
+
+
+if __name__ == "__main__":
+    main()
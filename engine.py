@@ -0,0 +1,261 @@
+"""Summary: This file contains the class Engine which holds the state of a game of Word-Flow without drawing anything.
+It loads a level into a Board of Character objects, changes the color or letter of a cell, checks the board against
+the level's answer and moves on to the next level. The changes of colors and letters can be undone and redone. It doesn't import pygame, so it can be used by tools, tests and
+servers, the game in game.py is a view that draws the engine's board and turns clicks and key presses into engine calls.
+Every change to the board can be recorded in a Journal (see journal.py) to save the progress of the game.
+The first board of each level is made once and never played on, every new board of that level is a copy on write copy
+of it (see Board.copy), so loading a level again or starting a new game doesn't depend on the size of the level."""
+
+from functools import lru_cache
+
+from board import Board, DEFAULT_COLOR
+from levels import read_levels, read_answers
+from levelpack import LevelPack, is_up_to_date
+from paths import PathIndex
+from dictionary import for_category
+
+
+def open_levels(json_file = "grid.json", json_answer = "answers.json", pack_file = "levels.wfp"):
+    """returns the (levels, answers) of the game, read from the compiled level pack
+    unless one of the json files was edited after the pack was built"""
+    if is_up_to_date(pack_file, json_file, json_answer):
+        pack = LevelPack(pack_file)
+        return pack.levels, pack.answers
+    return read_levels(json_file), read_answers(json_answer)
+
+
+class Engine:
+    """Class with the levels, their answers, the current level and the board being played"""
+    def __init__(self, levels, answers, shared = None):
+        """shared is an Engine of the same levels whose untouched boards are used instead of making new ones,
+        so any number of engines (like the players of a server) only make each level once"""
+        self.levels = levels # LevelRecord objects
+        self.answers = answers # answers in corresponding indexes to self.levels
+        self.last_level = len(levels) # current_level is last_level once every level was solved
+        self.current_level = 0
+        self.answers_shown = False # if the player chose to show the answers the board can no longer be changed
+        self.board = None
+        self.paths = None # PathIndex of the board
+        self._words = {} if shared is None else shared._words # level index -> {color: word of the answer}
+        self.journal = None # Journal the changes are recorded in, set by Journal.resume
+        self.undo_steps = [] # changes that can be undone, each a list of (kind, i, j, before, after), kind "c" or "l"
+        self.redo_steps = [] # changes that were undone, last undone last
+        # (index, show_answers) -> untouched (board, paths)
+        self._pristine = lru_cache(maxsize = 16)(self._make_pristine) if shared is None else shared._pristine
+        self.load_level(0)
+
+    def load_level(self, index, show_answers = False, prepared = None):
+        """makes a new board for the level at index and returns it.
+        If show_answers is True the cells are filled in with the level's answer.
+        prepared is the (board, path index) made by make_board for the same level, if it was made ahead of time"""
+        self.board, self.paths = prepared if prepared is not None else self.make_board(index, show_answers)
+        self.current_level = index
+        self.answers_shown = show_answers
+        self.undo_steps = []
+        self.redo_steps = []
+        self._record("v", index, show_answers)
+        return self.board
+
+    def make_board(self, index, show_answers = False):
+        """returns a new (board, path index) for the level at index without changing the current level,
+        so the next level can be made ready on another thread while this one is played"""
+        board, paths = self._pristine(index, show_answers)
+        board = board.copy()
+        return board, paths.copy(board)
+
+    def _make_pristine(self, index, show_answers):
+        # the first board of a level, only ever copied
+        record = self.levels[index]
+        cells = record.cells
+        if show_answers:
+            answer = self.answers[index]
+            # given letters keep their capitalization
+            cells = [[(cell.letter if not cell.has_text else answer[i][j][0], answer[i][j][1], cell.has_text, cell.color_change)
+                      for j, cell in enumerate(row)] for i, row in enumerate(cells)]
+        board = Board.from_cells(cells, record.category)
+        board.copy().clear() # the cleared arrays are made once here, every board of the level shares them
+        return board, PathIndex(board)
+
+    def replace_levels(self, levels, answers, changed):
+        """swaps in new lists of levels and answers, changed is the set of the indexes of the levels that were edited.
+        The current board is kept, returns True if the caller must load the current level again because it was edited or
+        removed. A game where every level was solved stays finished, whatever levels were added"""
+        finished = self.is_finished()
+        self.levels = levels
+        self.answers = answers
+        self.last_level = len(levels)
+        # new caches, a board being made on another thread from the old levels goes to the old one
+        self._words = {index: words for index, words in self._words.items() if index not in changed}
+        self._pristine = lru_cache(maxsize = 16)(self._make_pristine)
+        if finished:
+            self.current_level = self.last_level
+            return False
+        return self.current_level in changed or self.current_level >= self.last_level
+
+    def _record(self, *entry):
+        # passes a change to the journal, if the game is being saved
+        if self.journal is not None:
+            self.journal.record(entry)
+
+    def show_answers(self):
+        """replaces the board with the answer of the current level, returns the new board"""
+        return self.load_level(self.current_level, show_answers = True)
+
+    def new_game(self):
+        """starts again from the first level, the level records are never changed so a fresh board is a new game"""
+        return self.load_level(0)
+
+    def set_color(self, i, j, color):
+        """changes the color of the cell in row i and column j, returns True if the cell changed.
+        Path ends and the cells of a board showing the answers can't be changed"""
+        character = self.board.GetBoard()[i][j]
+        if self.answers_shown or not character.get_color_change() or character.GetColor() == color:
+            return False
+        self._done([("c", i, j, character.GetColor(), color)])
+        self._put_color(i, j, color)
+        return True
+
+    def _put_color(self, i, j, color):
+        character = self.board.GetBoard()[i][j]
+        old_color = character.GetColor()
+        character.SetColor(color)
+        self.paths.update(i, j, old_color)
+        self._record("c", i, j, color)
+
+    def set_letter(self, i, j, letter):
+        """changes the letter of the cell in row i and column j, returns True if the cell changed.
+        Given letters and the cells of a board showing the answers can't be changed"""
+        character = self.board.GetBoard()[i][j]
+        if self.answers_shown or not character.get_has_text() or character.get_letter() == letter:
+            return False
+        self._done([("l", i, j, character.get_letter(), letter)])
+        self._put_letter(i, j, letter)
+        return True
+
+    def _put_letter(self, i, j, letter):
+        self.board.GetBoard()[i][j].SetLetter(letter)
+        self._record("l", i, j, letter)
+
+    def _done(self, step):
+        # a new change can be undone, and the changes that were undone can't be redone anymore
+        self.undo_steps.append(step)
+        self.redo_steps = []
+
+    def undo(self):
+        """takes back the last change of a color or a letter (all the cells reset by a failed check are one change),
+        returns the (i, j) of the cells that changed"""
+        if not self.undo_steps:
+            return []
+        step = self.undo_steps.pop()
+        for kind, i, j, before, _ in reversed(step):
+            if kind == "c":
+                self._put_color(i, j, before)
+            else:
+                self._put_letter(i, j, before)
+        self.redo_steps.append(step)
+        return [(i, j) for _, i, j, _, _ in step]
+
+    def redo(self):
+        """makes the last change that was undone again, returns the (i, j) of the cells that changed"""
+        if not self.redo_steps:
+            return []
+        step = self.redo_steps.pop()
+        for kind, i, j, _, after in step:
+            if kind == "c":
+                self._put_color(i, j, after)
+            else:
+                self._put_letter(i, j, after)
+        self.undo_steps.append(step)
+        return [(i, j) for _, i, j, _, _ in step]
+
+    def words(self, index = None):
+        """returns a dictionary color -> word with the words of the answer of a level (the current one by default)"""
+        if index is None:
+            index = self.current_level
+        if index not in self._words:
+            answer = self.answers[index]
+            index_of_answer = PathIndex(self._answer_board(index))
+            words = {}
+            for color in index_of_answer.ends:
+                path = index_of_answer.path(color)
+                if path is not None:
+                    words[color] = "".join(answer[i][j][0] for i, j in path)
+            self._words[index] = words
+        return self._words[index]
+
+    def _answer_board(self, index):
+        # the answer of a level as a Board, to compare whole boards at once
+        record = self.levels[index]
+        answer = self.answers[index]
+        return Board.from_cells([[answer[i][j] + (cell.has_text, cell.color_change) for j, cell in enumerate(row)]
+                                 for i, row in enumerate(record.cells)], record.category)
+
+    def status(self):
+        """returns (set of the colors whose path is complete, True if the level is solved)"""
+        return self.paths.complete_colors(), self.is_solved()
+
+    def is_solved(self):
+        """returns True if every cell is part of a complete path that spells a word: the word of its color in the answer
+        or any word in the word list of the level's category. Any layout of the paths is accepted"""
+        if not self.paths.is_full():
+            return False
+        words = self.words()
+        dictionary = for_category(self.board.GetCategory())
+        for color in self.paths.ends:
+            if not self.paths.is_complete(color):
+                return False
+            if color in words and self.paths.path(color, words[color]) is not None:
+                continue
+            if dictionary is None or self.paths.path(color, dictionary = dictionary) is None:
+                return False
+        return True
+
+    def check(self):
+        """Checks the board against the answer of the current level.
+        A solved board passes whatever the layout of its paths, otherwise wrong letters are erased and wrong colors
+        (compared with the stored answer) go back to default, except for the ends of a path.
+        Returns (solved, list of the (i, j) of the cells that were reset)"""
+        if self.is_solved():
+            return True, []
+        reset = self.board.differences(self._answer_board(self.current_level))
+        self.reset(reset)
+        return not reset, reset
+
+    def reset(self, cells):
+        """erases the letters and colors that can be changed of the given (i, j) cells, as a failed check does"""
+        grid = self.board.GetBoard()
+        step = []
+        for i, j in cells:
+            if grid[i][j].get_color_change() and grid[i][j].GetColor() != DEFAULT_COLOR:
+                step.append(("c", i, j, grid[i][j].GetColor(), DEFAULT_COLOR))
+            if grid[i][j].get_has_text() and grid[i][j].get_letter() != " ":
+                step.append(("l", i, j, grid[i][j].get_letter(), " "))
+        if step:
+            self._done(step)
+        for i, j in cells: # the path index follows the colors one cell at a time
+            character = grid[i][j]
+            if character.get_color_change(): # the ends of the paths keep their color
+                old_color = character.GetColor()
+                character.SetColor(DEFAULT_COLOR)
+                self.paths.update(i, j, old_color)
+        self.board.clear(cells)
+        if self.journal is not None:
+            for i, j in cells:
+                if grid[i][j].get_color_change():
+                    self._record("c", i, j, DEFAULT_COLOR)
+                if grid[i][j].get_has_text():
+                    self._record("l", i, j, grid[i][j].get_letter())
+
+    def advance(self, prepared = None):
+        """moves on to the next level (using the board of make_board if it was prepared), returns False if there are no levels left"""
+        if self.current_level + 1 >= self.last_level:
+            self.current_level = self.last_level
+            self.answers_shown = False
+            self._record("v", self.last_level, False)
+            return False
+        self.load_level(self.current_level + 1, prepared = prepared)
+        return True
+
+    def is_finished(self):
+        """returns True once every level was solved"""
+        return self.current_level == self.last_level
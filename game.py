@@ -10,15 +10,30 @@ Once a path is made with colors, users have to also spell out a word of the give
 import pygame
 from button import *
 from board import *
+from assets import images, texts
+from renderer import LevelRenderer, letter_size
+from clickmap import ClickMap
+from profiler import profiler
+from engine import Engine, open_levels
+from journal import Journal, state_of, restore
+from levelwatch import LevelWatcher
+from telemetry import Telemetry
+from viewport import Viewport
+from recording import LiveInput
 import sys
-import json
 import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+
+# posted by the level watcher's thread when level files were edited
+LEVELS_CHANGED = pygame.event.custom_type()
 
 
 class Game:
 
 
-    def __init__(self):
+    def __init__(self, fps = 60, journal = None, source = None, watcher = None, telemetry = None):
         pygame.init() # initializes pygame
 
 
@@ -28,15 +43,30 @@ class Game:
         self.bg_color = (255, 255, 255)
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         pygame.display.set_caption("Word-Flow")
+
+
+        # frame pacing, the game never draws more than fps frames per second and sleeps while nothing happens
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.source = source if source is not None else LiveInput() # where the input of each frame is read from, see recording.py
+        self.clicks = [] # positions of the left clicks made since the last frame, used by the Button objects and the click maps
+        self.writing = None # (row, column) of the cell the player is typing into, None when not in "writing mode"
+        self.transition_time = 1 # seconds the "moving on" message is shown between levels
+        self.transition = 0 # frames left of the "moving on" message, counted in frames so a replay shows it as long
+        self.transition_length = 0 # frames the current "moving on" message lasts
+        self.show_hud = False # profiler summary drawn over the screen, toggled with "p"
+        self.telemetry = telemetry # records how each level is played, see telemetry.py
+        self.level_time = 0 # seconds the current level was on the screen, the menus don't count
+        self._played_at = None # time the last level frame was drawn, None if the frame before was a menu
                
         # attributes to be used if game is paused / in order to pause the game
         self.game_paused = False
         # loading in images and initializing button objects for the paused menu
-        pause_button_image = pygame.image.load("images/Menu/Pause Button Solid.png").convert_alpha()
+        pause_button_image = images.image("images/Menu/Pause Button Solid.png")
         self.pause_button = Button(self.screen_width-70, 50, pause_button_image,0.6,self)  
-        info_image = pygame.image.load("images/Menu/Info Solid.png").convert_alpha()
-        quit_image = pygame.image.load("images/Menu/Quit Solid.png").convert_alpha()
-        new_game_image = pygame.image.load("images/Menu/New Game Solid.png").convert_alpha()
+        info_image = images.image("images/Menu/Info Solid.png")
+        quit_image = images.image("images/Menu/Quit Solid.png")
+        new_game_image = images.image("images/Menu/New Game Solid.png")
         self.new_game_button = Button(self.screen_width/2,self.screen_height/4, new_game_image,1,self)
         self.info_button = Button(self.screen_width/2,(self.screen_height/4)*2,info_image,1,self)
         self.quit_button = Button(self.screen_width/2,(self.screen_height/4)*3,quit_image,1,self)
@@ -46,45 +76,46 @@ class Game:
         self.main_menu = True
         self.info_menu2 = False # second page of the menu
         self.info_menu = False
-        new_game_image = pygame.image.load("images/Menu/New Game Solid.png").convert_alpha()
+        new_game_image = images.image("images/Menu/New Game Solid.png")
         self.main_new_button = Button(self.screen_width/2,self.screen_height/5 *2, new_game_image,1,self)
         self.main_info_button = Button(self.screen_width/2,(self.screen_height/5)*3,info_image,1,self)
         self.main_quit_button = Button(self.screen_width/2,(self.screen_height/5)*4,quit_image,1,self)
-        self.title_image = pygame.image.load("images/Menu/Word-Flow Logo.png").convert_alpha()
-        exit_image = pygame.image.load("images/Menu/Exit Button.png").convert_alpha()
+        self.title_image = images.image("images/Menu/Word-Flow Logo.png")
+        exit_image = images.image("images/Menu/Exit Button.png")
         self.exit_button = Button(self.screen_width-70, 50,exit_image, 0.6, self)
-        next_image = pygame.image.load("images/Menu/Next Button.png").convert_alpha()
+        next_image = images.image("images/Menu/Next Button.png")
         self.next_button = Button(self.screen_width-150, 50,next_image, 0.6, self)
        
         # info menu pages loaded and scaled for the given window size
-        self.info_menu_page1 = pygame.image.load("images/Menu/Info Page 1.png").convert_alpha()
-        self.info_menu_page2 = pygame.image.load("images/Menu/Info Page 2.png").convert_alpha()
-        width = self.info_menu_page1.get_width()
-        height = self.info_menu_page1.get_height()
-        scale = 0.359
-        self.info_menu_page1 = pygame.transform.scale(self.info_menu_page1,(int(width*scale),int(height*scale)))
-        self.info_menu_page2 = pygame.transform.scale(self.info_menu_page2,(int(width*scale),int(height*scale)))
+        self.info_menu_page1 = images.image("images/Menu/Info Page 1.png", 0.359)
+        self.info_menu_page2 = images.image("images/Menu/Info Page 2.png", 0.359)
 
 
-        # creating the base font for the "character" objects (AKA each cell)
-        self.base_font = pygame.font.Font(None, 32)
+        # the base font for the "character" objects (AKA each cell), as (font file, size) for the text cache, at the biggest zoom
+        self.cell_font = (None, 32)
 
 
-        # load in level information and answers
-        self.current_level = 0
-        self.levels = []
-        json_file = "grid.json"
-        self.load_levels(json_file,self.levels) # levels are stored in Board objects and all in a linear list
+        # load in level information and answers, the engine keeps the levels, the current level and its board
+        # and the game only draws them and turns the player's input into engine calls
+        # with a LevelWatcher the levels come from the json files and are swapped in again when they are edited
+        self.watcher = watcher
+        self.engine = Engine(watcher.levels, watcher.answers) if watcher is not None else Engine(*open_levels())
+        self.journal = journal # saves every change to the board, the progress saved last time is put back first
+        if journal is not None:
+            journal.resume(self.engine)
+        self.source.start(self) # a replayed session puts back the board it was recorded with
+        # the grid is drawn inside board_area, scrolled and zoomed by a Viewport when it doesn't fit
+        self.board_area = pygame.Rect(180, 90, 980, 520)
+        self.cell_size = images.image("images/Default Key.png").get_size() # size of the key images before scaling
 
 
-        # loading answers from a local json file.
-        self.answers = []
-        json_answer = "answers.json"
-        self.load_levels(json_answer,self.answers) # answers are 2d lists stored in corresponding indexes in self.answers to self.levels
+        # the next level's board, buttons and text are made ready on this thread while the current one is played
+        self.prefetcher = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "prefetch")
+        self._prefetched = None # (level index, future of _prepare_level) of the level being made ready
 
 
-        # self.characters represents the current level being played
-        self.characters = self.levels[self.current_level].GetBoard()
+        # self.characters represents the current level being played, its buttons are only made now
+        self.characters = self.build_level()
 
 
         # Initializing buttons for color selection
@@ -92,78 +123,130 @@ class Game:
         self.color_buttons = []
         self.colors_index = [False, False, False, False, False, False, False, False, False] #status of each button (if a specific color of a corresponding index is currently selected)
         for color in range(len(self.colors)):
-            image = pygame.image.load("Images/buttons/"+self.colors[color]+" Button.png").convert_alpha()
+            image = images.image("images/buttons/"+self.colors[color]+" Button.png")
             button  = Button(100,80+(color*80),image,0.2,self)
             self.color_buttons.append(button)
+        images.preload(["images/"+color+" Key.png" for color in self.colors]) # every key color is decoded now so recoloring a cell never reads from disk
+        for color in self.colors: # and sized for the cells once, every cell's button shares these surfaces
+            images.scaled(images.image("images/"+color+" Key.png"), 0.4)
 
 
         # initializes "check" button that players will use in order to check if their work is correct
         self.check = False
-        check_image = pygame.image.load("images/Menu/Check Solid.png").convert_alpha()
+        check_image = images.image("images/Menu/Check Solid.png")
         self.check_button =  Button(1000,650, check_image, 0.625, self)
 
 
         # show answers button in case the player is lost
-        show_answers_image = pygame.image.load("images/Menu/Show Answers Button.png").convert_alpha()
+        show_answers_image = images.image("images/Menu/Show Answers Button.png")
         self.show_answers_button =  Button(1000,730, show_answers_image, 0.625, self)
-        self.checked = False # if player chose to show answers, the player can no longer go into "writting" mode
 
 
-        # used to see if user did all levels
-        self.last_level = len(self.levels)
+        # the controls of the level screen, clicks are looked up in it instead of asking every button
+        self.control_map = ClickMap()
+        for button in self.color_buttons + [self.check_button, self.pause_button, self.show_answers_button]:
+            self.control_map.add(button.rect, button)
+
+
+        # draws the level screen, only redrawing the parts of it that changed
+        self.renderer = LevelRenderer(self)
+        if watcher is not None:
+            watcher.start(lambda: pygame.event.post(pygame.event.Event(LEVELS_CHANGED)))
+        self._start_level()
+
+
+
 
 
 
+    def build_level(self, prepared = None):
+        """Creates the buttons to represent the grid of the engine's board appropriately and returns the grid,
+        the viewport decides which of the cells are shown and where.
+        prepared is the (board, paths, viewport) of _prepare_level if the board was made ready in the background,
+        its buttons are already made. The next level starts getting ready as soon as this one is built"""
+        if prepared is not None and prepared[0] is self.engine.board:
+            self.viewport = prepared[2]
+        else:
+            self.viewport = self._make_cells(self.engine.board)
+        grid = self.engine.board.GetBoard()
+        self.characters = grid
+        self._layout_cells()
+        self._prefetch(self.engine.current_level + 1)
+        return grid
 
 
+    def _make_cells(self, board):
+        """gives every cell of board a button in its color and returns the Viewport its grid is shown through"""
+        grid = board.GetBoard()
+        viewport = Viewport(self.board_area, (len(grid), len(grid[0]) if grid else 0), self.cell_size)
+        for i in range(len(grid)): # iterating per column (as per the structure of the json file)
+            for j in range(len(grid[i])): #iterating per object in a given column
+                character_image = images.image("images/"+grid[i][j].GetColor()+" Key.png") # starts a cell in the given color
+                grid[i][j].set_button(Button(0,0,character_image,viewport.zoom,self)) # placed by _layout_cells once it is visible
+        return viewport
 
-    def load_levels(self, json_file,lst):
-        """Loads the levels from a json file and creates characters and buttons to represent a grid appropriately.
-        It then stores them in a board object and appends it to the self.levels list.
-        Alternatively if lst is self.answers then it stores the answers for a given level in
-        the list"""
-        with open(json_file, "r") as file:
-            data = json.load(file)
-        i = 0 # i and j are used to know the spacing between cells in a grid
-        j = 0
 
+    def _prefetch(self, index):
+        """starts making the level at index ready on the prefetch thread, unless it already is"""
+        if index >= self.engine.last_level or (self._prefetched is not None and self._prefetched[0] == index):
+            return
+        self._prefetched = (index, self.prefetcher.submit(self._prepare_level, index))
 
-        # below are calculations to find where the center of the grid should be
-        grid_cell_width = 212* 0.4
-        grid_cell_height = 215* 0.4
-        grid_padding = 2 #space between cells
-        grid_size = len(data[0])
-        grid_width = grid_size * grid_cell_width + (grid_size + 1) * grid_padding
-        grid_height = grid_size * grid_cell_height + (grid_size + 1) * grid_padding
 
+    def _prepare_level(self, index):
+        """runs on the prefetch thread: makes the board and the buttons of the level at index and renders its text
+        into the text cache, returns (board, paths, viewport) for Engine.advance and build_level"""
+        with profiler.phase("prefetch"):
+            board, paths = self.engine.make_board(index)
+            viewport = self._make_cells(board)
+            size = letter_size(self.cell_font, viewport.zoom)
+            for letter in {character.get_letter() for row in board.GetBoard() for character in row}:
+                texts.render(self.cell_font[0], size, letter)
+            texts.render("slkscr.ttf", 40, board.GetCategory())
+            texts.render("slkscr.ttf", 50, f"Moving on to Level {index+1}")
+        return board, paths, viewport
 
-        # Calculate the position to center the grid
-        grid_y = ((self.screen_width - grid_width) // 2) * 1.3
-        grid_x = ((self.screen_height - grid_height) // 2) - 20
 
+    def _take_prefetched(self, index):
+        """returns what _prepare_level made for the level at index, or None if it wasn't being made ready"""
+        if self._prefetched is None or self._prefetched[0] != index:
+            return None
+        future = self._prefetched[1]
+        self._prefetched = None
+        return future.result() # almost always done long ago, if not it is still quicker to wait than to start over
 
-        for grid in data:  #iterating per "level"
-            character_grid = []
-            i=0
-            for row in grid: # iterating per column (as per the structure of the json file)
-                character_row = []
-                j=0
-                for item in row: #iterating per object in a given column
-                    character_image = pygame.image.load("images/"+item['color']+" Key.png").convert_alpha() # starts a cell in the given color
-                    image_y = (grid_x + (j * (grid_cell_width + grid_padding)) + grid_padding ) - 160
-                    image_x = (grid_y + (i * (grid_cell_height + grid_padding)) + grid_padding) -40 # location of the button in the grid
-                    character_button = Button(image_x,image_y,character_image,0.4,self)
-                    character = Character(item['letter'], item['color'], character_button, item['has_text'], item['color_change'])
-                    character_row.append(character)
-                    j+=1
-                character_grid.append(character_row)
-                i+=1
-            temp = Board(character_grid) # creates one board object per level
-            lst.append(temp)
-        categories =  ["Warm Up (In At)", "Actions", "Shapes", "Colors", "Sports", "Onomatopoeia","Streaming Services" ,\
-                    "Animals", "Companies", "Food", "Disney Characters" ]
-        for board in range(len(lst)):
-            lst[board].SetCategory(categories[board])
+
+    def _layout_cells(self):
+        """places the buttons of the cells the viewport shows and puts them in self.cell_map to find which one was clicked,
+        the cells outside of the viewport are neither drawn nor clicked"""
+        view = self.viewport
+        self.cell_map = ClickMap(view.pitch()[0])
+        for (i, j), position in view.placed_cells():
+            character = self.characters[i][j]
+            button = character.get_button()
+            if button.scale != view.zoom: # the image of each zoom is scaled once and shared by all the cells
+                button.scale = view.zoom
+                button.change_image(images.image("images/"+character.GetColor()+" Key.png"))
+            button.rect = button.image.get_rect(topleft = position)
+            self.cell_map.add(button.rect.clip(view.area), (i, j))
+
+
+    def scroll(self, dx, dy):
+        """scrolls the grid by dx and dy pixels"""
+        if self.viewport.scroll(dx, dy):
+            self._layout_cells()
+
+
+    def zoom(self, steps, around = None):
+        """zooms the grid in (steps > 0) or out around a screen position"""
+        if self.viewport.set_zoom(self.viewport.zoom_index + steps, around):
+            self._layout_cells()
+
+
+    def _refresh_cell(self, i, j):
+        """changes the image of a cell's button to the cell's current color"""
+        character = self.characters[i][j]
+        character.get_button().change_image(images.image("images/"+character.GetColor()+" Key.png"))
            
 
 
@@ -171,66 +254,136 @@ class Game:
         """Main loop for the game. it will keep running until the game is done
         There are 5 main types of events, game is being paused (pulls up paused menu),
         game just started or newgame button was clicked, checking answers with check button,
-         main event for game  being played, and Info screen shown. """
-       
+         main event for game  being played, and Info screen shown.
+        A frame is drawn for every batch of input, if a frame doesn't change the state of the game
+        the loop waits for the next event instead of drawing the same frame again"""
+        idle = False
         while True:
-            self.screen.fill(self.bg_color) # fill in background
-            self._check_events() #checks for special keyboard events
-
-
-            if self.current_level == self.last_level: # if player won the game
-                font = pygame.font.Font("slkscr.ttf", 50)
-                text_surface = font.render("You won!", True, (0,0,0))
-                self.screen.blit(text_surface, ((self.screen_width-150)/2 - 50,(self.screen_height-50)/2))
-                pygame.display.flip()
-            elif self.info_menu2: # if the second page of the menu should be up
-                self._info_menu2()
-            elif self.info_menu: #if the info menu should be up
-                self._info_menu()
-            elif self.main_menu: # if main menu should be pulled up
-                self._main_menu()
-            elif self.game_paused: # if the paused menu should be pulled up
-                self._paused()
-            elif self.check:  # if the player requested to check his answers
+            with profiler.phase("events"):
+                self._check_events(wait = idle) #checks for special keyboard events
+            before = self._screen_state()
+            with profiler.phase("update"):
+                self._update_screen()
+            idle = self._screen_state() == before # the screen shows the current state, nothing to do until new input
+            with profiler.phase("tick"):
+                self.clock.tick(self.fps)
+            profiler.end_frame()
+
+
+    def _screen_state(self):
+        """returns the attributes that decide what is on the screen"""
+        return (self.main_menu, self.info_menu, self.info_menu2, self.game_paused, self.check,
+                self.engine.current_level, id(self.characters), self.writing, self.show_hud, self.viewport.version,
+                self.transition)
+
+
+    def _update_screen(self):
+        """draws one frame of whatever screen the game is in"""
+        if not self.engine.is_finished() and not (self.info_menu or self.main_menu or self.game_paused or self.transition):
+            # a level is being played, the renderer only redraws what changed so the screen isn't filled here
+            if self.check:  # if the player requested to check his answers
                 self._is_checked()
             else: # main event, where game is running a level
-                self.draw_categories() # draw the category on the screen
-                self.draw_color_buttons() # draw the color buttons on the screen
-
-
-                for row in range(len(self.characters)): # draw the characters/cells on the screen
-                    for character in range(len(self.characters[row])):
-                        self.character_update(row,character)
-                        self.draw_character_text(self.characters[row][character])
-                if self.check_button.draw(): # checks if player pressed paused or check buttons
-                    self.check = True
-                if self.pause_button.draw(): # if game is paused
-                    self.pause_button.change_image(pygame.image.load("images/Menu/Exit Button.png").convert_alpha()) # change the image of the pause button to a resume button
-                    self.game_paused = True
-                if self.show_answers_button.draw(): # checks if user wants to show the answers
-                    self.characters = self.answers[self.current_level].GetBoard()
-                    self.checked = True
+                self._play_level()
+            return
+
+
+        # menus are drawn over the whole window
+        self.screen.fill(self.bg_color) # fill in background
+        if self.engine.is_finished(): # if player won the game
+            text_surface = texts.render("slkscr.ttf", 50, "You won!")
+            self.screen.blit(text_surface, ((self.screen_width-150)/2 - 50,(self.screen_height-50)/2))
+        elif self.info_menu2: # if the second page of the menu should be up
+            self._info_menu2()
+        elif self.info_menu: #if the info menu should be up
+            self._info_menu()
+        elif self.main_menu: # if main menu should be pulled up
+            self._main_menu()
+        elif self.game_paused: # if the paused menu should be pulled up
+            self._paused()
+        elif self.transition: # a level was just solved
+            self._moving_on()
+        self.renderer.draw_hud()
+        with profiler.phase("display"):
             pygame.display.flip() # flip the image to show updates
+        self.renderer.invalidate() # the level screen was covered, so it has to be fully redrawn when it comes back
+        self._played_at = None # the time spent in a menu isn't played
+
+
+    def _track(self, kind, value = None):
+        """records a telemetry event of the current level, if telemetry is on"""
+        if self.telemetry is not None:
+            self.telemetry.record(kind, self.engine.current_level, value)
+
+
+    def _start_level(self):
+        """starts timing a new level"""
+        self.level_time = 0
+        self._played_at = None
+        self._track("start")
+
+
+    def _play_level(self):
+        """Finds the color buttons, cells and control buttons that were clicked
+        and then lets the renderer redraw the parts of the level that changed"""
+        now = time.perf_counter()
+        if self._played_at is not None: # the time since the last frame, waiting for input included, if it was a level frame
+            self.level_time += now - self._played_at
+        self._played_at = now
+        for pos in self.clicks:
+            cell = self.cell_map.find(pos)
+            if cell is not None: # the characters/cells on the screen
+                self.character_update(*cell)
+                continue
+            button = self.control_map.find(pos)
+            if button in self.color_buttons: # a new color was selected, which also kicks player out of writting mode
+                self.select_color(self.color_buttons.index(button))
+                self.writing = None
+            elif button is self.check_button: # checks if player pressed paused or check buttons
+                self.check = True
+                self.writing = None
+            elif button is self.pause_button: # if game is paused
+                self.pause_button.change_image(images.image("images/Menu/Exit Button.png")) # change the image of the pause button to a resume button
+                self.game_paused = True
+                self.writing = None
+                break # the other clicks were made on the level, not on the pause menu
+            elif button is self.show_answers_button and self.writing is None: # checks if user wants to show the answers
+                self._track("answers")
+                self.engine.show_answers()
+                self.characters = self.build_level()
+        self.renderer.set_visible(self.show_answers_button, self.writing is None) # answers can't be shown in writing mode
+        self.renderer.draw()
 
 
     def _is_checked(self):
         """if the checked button is presed it either erases wrong entries
-        or lets player move on to next round"""
+        or lets player move on to next round. The next level was made ready in the background while this one
+        was played, so switching to it is instant and the "moving on" message is drawn frame by frame over it"""
         if self.check_answers(): # answer is right, moving on to next level
-            self.current_level +=1
-            self.checked = False # reset the checked status
-            if self.current_level != self.last_level: #if game is not over
-                self.characters = self.levels[self.current_level].GetBoard()[:]
-                self.screen.fill(self.bg_color)    
-                font = pygame.font.Font("slkscr.ttf", 50)
-                text_surface = font.render(f"Moving on to Level {self.current_level+1}", True, (0,0,0)) # dislpay intermediate message
-                width, height = text_surface.get_rect().size
-                self.screen.blit(text_surface, (((self.screen_width-width)/2),(self.screen_height/2)-40))
-                pygame.display.flip()
-                time.sleep(1)
+            self._track("solved", round(self.level_time, 3))
+            prepared = self._take_prefetched(self.engine.current_level + 1)
+            if self.engine.advance(prepared[:2] if prepared is not None else None): #if game is not over
+                self.characters = self.build_level(prepared)
+                self._start_level()
+                self.transition_length = max(0, round(self.transition_time * (self.fps or 60)))
+                self.transition = self.transition_length
         self.check = False
 
 
+    def _moving_on(self):
+        """draws one frame of the message shown between two levels, with a bar that fills up until the new level
+        is shown. The game keeps reading events meanwhile, and a click skips the rest of it"""
+        text_surface = texts.render("slkscr.ttf", 50, f"Moving on to Level {self.engine.current_level+1}") # dislpay intermediate message
+        width, height = text_surface.get_rect().size
+        self.screen.blit(text_surface, (((self.screen_width-width)/2),(self.screen_height/2)-40))
+        bar = pygame.Rect(0, 0, 400, 12)
+        bar.midtop = (self.screen_width/2, self.screen_height/2 + height)
+        done = 1 - (self.transition - 1) / self.transition_length
+        pygame.draw.rect(self.screen, (220, 220, 220), bar, border_radius = 6)
+        pygame.draw.rect(self.screen, (232, 62, 183), (bar.x, bar.y, int(bar.width*done), bar.height), border_radius = 6)
+        self.transition = 0 if self.clicks else self.transition - 1
+
+
     # Below are all the different menu related functions
     def _info_menu(self):
         """Displays the info menu of the game which has two pages,
@@ -240,7 +393,7 @@ class Game:
         if self.exit_button.draw():
             self.info_menu = False
         elif self.next_button.draw():
-            self.next_button.change_image(pygame.image.load("images/Menu/Back Button.png").convert_alpha()) # change the image of the pause button to a resume button
+            self.next_button.change_image(images.image("images/Menu/Back Button.png")) # change the image of the pause button to a resume button
             self.info_menu2 = True  
 
 
@@ -250,7 +403,7 @@ class Game:
         """Shows second page in the info menu"""
         self.screen.blit(self.info_menu_page2, (0,0))
         if self.next_button.draw():
-            self.next_button.change_image(pygame.image.load("images/Menu/Next Button.png").convert_alpha()) # change the image of the pause button to a resume button
+            self.next_button.change_image(images.image("images/Menu/Next Button.png")) # change the image of the pause button to a resume button
             self.info_menu2 = False
         elif self.exit_button.draw():
             self.info_menu = False
@@ -278,160 +431,199 @@ class Game:
             sys.exit()
         elif self.new_game_button.draw():  # pulls up the main menu again for players to restart the game
             self.game_paused = False
-            self.pause_button.change_image(pygame.image.load("images/Menu/Pause Button Solid.png").convert_alpha()) # change the image of the pause button to a resume button
-            self.current_level = 0 # reset the game to level 0
-            self.levels = [] # reset the levels
-            self.load_levels("grid.json",self.levels)
-            self.characters = self.levels[self.current_level].GetBoard()
+            self.pause_button.change_image(images.image("images/Menu/Pause Button Solid.png")) # change the image of the pause button to a resume button
+            self.engine.new_game() # reset the game to level 0
+            self.characters = self.build_level()
+            self._start_level()
             self.main_menu = True
         elif self.pause_button.draw():
-            self.pause_button.change_image(pygame.image.load("images/Menu/Pause Button Solid.png").convert_alpha()) # change the image of the pause button to a resume button
+            self.pause_button.change_image(images.image("images/Menu/Pause Button Solid.png")) # change the image of the pause button to a resume button
             self.game_paused = False
        
 
 
     def check_answers(self):
         """Checks to see if answers are correct, if they are returns true, if not
-        returns false and changes the color back to default and resets the character letter
-        returns True if the answer is correct"""
-        x = True
-        for i in range(len(self.characters)):
-            for j in range(len(self.characters[i])):
-                if self.characters[i][j] != self.answers[self.current_level].GetBoard()[i][j]:
-                    x = False
-                    self.characters[i][j].SetLetter(" ")
-                    if self.characters[i][j].get_color_change(): # checks if the mistaken cell is an end cell
-                        new_image = pygame.image.load("Images/Default Key.png").convert_alpha()
-                        self.characters[i][j].change_button_color(new_image, "Default") # updates the buttons color
-        return x
+        returns false and the engine changes the wrong cells back to default and resets their letters,
+        the buttons of those cells are updated to match"""
+        solved, reset = self.engine.check()
+        self._track("check", len(reset))
+        for i, j in reset:
+            self._refresh_cell(i, j)
+        return solved
    
 
 
     def character_update(self,i, j):
-        """update the character object on the screen
-        drawing its button and checking if it is being clicked,
-        and if so changing the color appropriately
-       
-        once selected places the user in "writing mode" where they can enter
-        text input for a given cell/character"""
-
-
-        if self.characters[i][j].get_button().draw(): # drawing button and seeing if it is selected
-            if not self.checked: # if player didn't check the answers
-                self.update_character_color(i,j)                
-                # checks if the button pressed has a modifiable character (isn't a given start or end, and isn't one of the color select buttons)
-                if self.characters[i][j].get_has_text():
-                    running = True
-                    text = self.characters[i][j].get_letter()
-                    while running: # player stuck in "writing mode" until he enters "enter" to select new character or selects a cell
-                        self.screen.fill(self.bg_color)
-                        self.draw_categories() # draw category in the screen
-   
-                        # draw up the color buttons as well so they dont get covered also kicks player out of writting mode if selected
-                        running = not self.draw_color_buttons()
-
-                        # redraw up the grid so it doesn't get covered
-                        for indexi in range(len(self.characters)):
-                            for indexj in range(len(self.characters[indexi])):
-                                if self.characters[indexi][indexj].get_button().draw():
-                                    i=indexi
-                                    j=indexj
-                                    self.update_character_color(i,j)
-                                    text = self.characters[i][j].get_letter()
-                                self.draw_character_text(self.characters[indexi][indexj]) # draw each characters text
-                        if self.check_button.draw(): # checks if player pressed paused or check buttons
-                            self.check = True
-                            running = False #FIXME
-                        if self.pause_button.draw(): # if game is paused
-                            self.pause_button.change_image(pygame.image.load("images/Menu/Exit Button.png").convert_alpha()) # change the image of the pause button to a resume button
-                            self.game_paused = True
-                            running = False # FIXME
-
-
-                        for event in pygame.event.get(): # get user input text  
-                            if event.type == pygame.QUIT:
-                                sys.exit()
-                            # handle text input
-                            if event.type == pygame.TEXTINPUT:
-                                text = event.text
-                            # handle special keys
-                            if event.type == pygame.KEYDOWN:
-                                if event.key == pygame.K_RETURN:
-                                    running = False
-                                elif event.key == pygame.K_BACKSPACE:
-                                    text = ""
-                        self.characters[i][j].SetLetter(text) # updates the character for the given cell
-
-
-                        pygame.display.flip()
-
-
-    def draw_color_buttons(self):
-        """draws the button indexes and checks if they were selected, if so it changes the color of the cell accordingly
-        returns true if one was pressed, false if not"""
-        x = False
-        for button_index in range(len(self.color_buttons)): # draws color buttons
-            if self.color_buttons[button_index].draw(): # checks which button was last pressed
-                self.colors_index = [False, False, False, False, False, False, False, False, False]
-                self.colors_index[button_index] = not self.colors_index[button_index]
-                x = True
-        return x
-                       
-    def draw_categories(self):
-        """displays the correct category,  according to whatever level it is, on the screen"""
-        font = pygame.font.Font("slkscr.ttf", 40)
-        text_surface = font.render(f"Category:", True, (0,0,0))
-        text_surface2 = font.render(f"{self.levels[self.current_level].GetCategory()}", True, (0,0,0))
-        self.screen.blit(text_surface, (200, 600))
-        self.screen.blit(text_surface2, (200, 650))
+        """update the character object on the screen after its button was clicked,
+        changing the color appropriately
 
+        once selected places the user in "writing mode" where they can enter
+        text input for a given cell/character, the letters typed are handled by _check_events"""
+        with profiler.phase("character_update"):
+            self._character_update(i, j)
+
+
+    def _character_update(self, i, j):
+        if not self.engine.answers_shown: # if player didn't show the answers
+            self.update_character_color(i,j)
+            # checks if the button pressed has a modifiable character (isn't a given start or end, and isn't one of the color select buttons)
+            # player stays in "writing mode" until he enters "enter", selects a color or selects a cell without text
+            if self.characters[i][j].get_has_text():
+                self.writing = (i, j)
+            else:
+                self.writing = None
 
 
+    def select_color(self, button_index):
+        """selects the color of the color button at button_index"""
+        self.colors_index = [False, False, False, False, False, False, False, False, False]
+        self.colors_index[button_index] = True
 
     def update_character_color(self,i,j):
         """function takes in two integers representing the row and column indexes of the character
         in the self.characters grid. It then changes its color appropriately"""
-        if self.characters[i][j].get_color_change(): # Checks if the character can have its color changed
-            for color in range(len(self.colors_index)):
-                if self.colors_index[color]:
-                    self.characters[i][j].SetColor(self.colors_index[color]) # changes the color attribute once cell changes color
-                    new_image = pygame.image.load("Images/"+self.colors[color]+" Key.png").convert_alpha()
-                    self.characters[i][j].change_button_color(new_image, self.colors[color]) # updates the buttons color with a new image
-
-
-
-
-    def draw_character_text(self, character):
-        """Given a character it draws on the screen its text attribute over its image"""
-        text_surface = self.base_font.render(character.get_letter(), True, (0,0,0))
-        self.screen.blit(text_surface, (character.get_button().rect.x + 35, character.get_button().rect.y +32))
+        for color in range(len(self.colors_index)):
+            if self.colors_index[color] and self.engine.set_color(i, j, self.colors[color]): # the engine checks if the character can have its color changed
+                self._refresh_cell(i, j) # updates the buttons color with a new image
 
 
 
 
     def _check_keydown_events(self, event):
-        """Checks if user pressed special key m which pulls up the paused menu"""
-        if event.key == pygame.K_m:
+        """Checks if user pressed special key m which pulls up the paused menu or p which shows the profiler HUD,
+        in writing mode enter leaves writing mode and backspace erases the cell's letter.
+        The arrow keys scroll the grid and + and - zoom it (except in writing mode, where they are letters),
+        ctrl+z undoes the last change of a color or letter and ctrl+y (or ctrl+shift+z) redoes it"""
+        pitch_x, pitch_y = self.viewport.pitch()
+        arrows = {pygame.K_LEFT: (-pitch_x, 0), pygame.K_RIGHT: (pitch_x, 0), pygame.K_UP: (0, -pitch_y), pygame.K_DOWN: (0, pitch_y)}
+        if event.key in arrows:
+            self.scroll(*arrows[event.key])
+        elif event.mod & pygame.KMOD_CTRL and event.key in (pygame.K_z, pygame.K_y):
+            redo = event.key == pygame.K_y or event.mod & pygame.KMOD_SHIFT
+            for i, j in (self.engine.redo() if redo else self.engine.undo()):
+                self._refresh_cell(i, j)
+        elif self.writing is not None:
+            i, j = self.writing
+            if event.key == pygame.K_RETURN:
+                self.writing = None
+            elif event.key == pygame.K_BACKSPACE:
+                self.engine.set_letter(i, j, "")
+        elif event.key == pygame.K_m:
             if self.game_paused:
                 self.game_paused = False
             else:
                 self.game_paused = True
+        elif event.key == pygame.K_p:
+            self.toggle_hud()
+        elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            self.zoom(1)
+        elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.zoom(-1)
+
+
+    def reload_levels(self):
+        """swaps the levels edited in the level files into the engine. Only an edited current level is built again,
+        keeping the colors and letters the player filled in where the new level still lets them be changed"""
+        levels, answers, changed = self.watcher.take()
+        if not changed:
+            return
+        state = state_of(self.engine)
+        edited = self.engine.replace_levels(levels, answers, changed)
+        if self._prefetched is not None and self._prefetched[0] in changed:
+            self._prefetched = None # made from the old level
+        if edited:
+            state.level = min(state.level, self.engine.last_level - 1)
+            restore(self.engine, state)
+            self.characters = self.build_level()
+        else:
+            self._prefetch(self.engine.current_level + 1)
+        print(f"reloaded level{'s' if len(changed) > 1 else ''} {', '.join(str(index + 1) for index in sorted(changed))}")
+
+
+    def _check_wheel_event(self, event):
+        mods = self.source.mods
+        if mods & pygame.KMOD_CTRL:
+            self.zoom(event.y, self.source.mouse)
+            return
+        pitch_x, pitch_y = self.viewport.pitch()
+        dx, dy = event.x*pitch_x, -event.y*pitch_y
+        if mods & pygame.KMOD_SHIFT:
+            dx, dy = dy, dx
+        self.scroll(dx, dy)
+
+
+    def toggle_hud(self):
+        """shows or hides the profiler HUD, the profiler only measures while the HUD is shown or a trace is recorded"""
+        self.show_hud = not self.show_hud
+        if self.show_hud:
+            profiler.enable()
+        elif not profiler.tracing:
+            profiler.disable()
+        self.renderer.show_hud(self.show_hud)
        
-    def _check_events(self):
-        """Checks for special events such as closing the tab and keydown events."""
-        for event in pygame.event.get():
+    def _check_events(self, wait = False):
+        """Checks for special events such as closing the tab, keydown events, text typed in writing mode and mouse clicks.
+        If wait is True and nothing happened yet, it sleeps until the next event arrives"""
+        events = self.source.read(wait)
+        self.clicks = []
+        for event in events:
             if event.type == pygame.QUIT:
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
                 self._check_keydown_events(event)
-
-
-
-
-
-
-x = Game() # Creates a game instance
-x.run_game() # Start the game
+            elif event.type == pygame.TEXTINPUT and self.writing is not None: # handle text input
+                i, j = self.writing
+                self.engine.set_letter(i, j, event.text) # updates the character for the given cell
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.clicks.append(event.pos)
+            elif event.type == pygame.MOUSEWHEEL: # the wheel scrolls the grid (sideways with shift) and zooms it with ctrl
+                self._check_wheel_event(event)
+            elif event.type == LEVELS_CHANGED and self.watcher is not None:
+                self.reload_levels()
+
+
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Word-Flow")
+    parser.add_argument("--fps", type = int, default = 60, help = "most frames drawn per second")
+    parser.add_argument("--profile", action = "store_true", help = "start with the profiler HUD shown")
+    parser.add_argument("--trace", metavar = "FILE", help = "record a Chrome trace of every frame, written to FILE on exit")
+    parser.add_argument("--memory", action = "store_true", help = "print the memory held by the image surfaces on exit")
+    parser.add_argument("--save", metavar = "FILE", default = "progress.journal", help = "journal the progress is saved in and resumed from")
+    parser.add_argument("--no-save", action = "store_true", help = "play without saving or resuming")
+    parser.add_argument("--record", metavar = "SESSION", help = "record the input to SESSION, to be replayed with recording.py")
+    parser.add_argument("--telemetry", metavar = "FILE", default = "telemetry.db", help = "SQLite file the play telemetry is added to")
+    parser.add_argument("--no-telemetry", action = "store_true", help = "play without recording telemetry")
+    parser.add_argument("--watch", nargs = "*", metavar = "FILE",
+                        help = "reload the levels as the level files (grid.json answers.json by default) are edited")
+    args = parser.parse_args()
+    if args.trace:
+        profiler.enable(tracing = True)
+    journal = None if args.no_save else Journal(args.save)
+    watcher = LevelWatcher(*args.watch) if args.watch is not None else None
+    telemetry = None if args.no_telemetry else Telemetry(args.telemetry)
+    x = Game(args.fps, journal, LiveInput(args.record), watcher, telemetry) # Creates a game instance
+    if args.profile:
+        x.toggle_hud()
+    try:
+        x.run_game() # Start the game
+    finally:
+        x.prefetcher.shutdown(cancel_futures = True)
+        if watcher is not None:
+            watcher.stop()
+        if telemetry is not None:
+            telemetry.close() # writes what is still buffered
+        x.source.stop(x) # a recording ends with the final board
+        if journal is not None:
+            journal.close() # writes what is still queued
+        if args.trace:
+            print(f"wrote {profiler.export(args.trace)} trace events to {args.trace}")
+        if args.memory:
+            print("\n".join(images.memory_report()))
 
 
 
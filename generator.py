@@ -0,0 +1,233 @@
+"""Summary: This file generates new levels, the random version of make_grid in main.py.
+A level is made by covering the grid with random paths (neighboring paths are joined end to end until the wanted
+number of colors is left), giving each path a word of its length and keeping the level only if the solver finds
+exactly one way to connect its path ends, under the rules of the engine (a path may run next to itself). The levels are made on a pool of processes and written to a level pack
+with their answers (and to json files like "grid.json" and "answers.json" if asked for).
+
+usage: python generator.py --size 6 --colors 5 --count 1000 [--category Animals] [--words FILE] [-o generated.wfp]
+                           [--json grid.json answers.json] [--workers N] [--seed N] [--max-tries N]"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dictionary import file_name, for_category, read_words
+from engine import DEFAULT_COLOR, open_levels
+from levels import CATEGORIES, CellRecord, LevelRecord, board_of, write_json
+from levelpack import write_pack
+from lint import walk_path
+from solver import find_endpoints, is_unique
+
+
+# colors that have a button in the game
+COLORS = ["Red", "Orange", "Yellow", "Green", "Light Blue", "Medium Blue", "Dark Blue", "Pink"]
+
+MIN_LENGTH = 3 # shortest word a path can hold
+CHUNK = 25 # levels made by one task of the pool
+MAX_TRIES = 10000 # layouts tried in a row without making a level before giving up
+
+
+def words_of(levels, answers, category = None):
+    """returns the words of the built in answers (of one category, or of all of them), read along each color path"""
+    words = set()
+    for record, answer in zip(levels, answers):
+        if category is not None and record.category != category:
+            continue
+        board = board_of(record)
+        for color, (start, end) in find_endpoints(board).items():
+            blob = {(i, j) for i in range(len(answer)) for j in range(len(answer[i])) if answer[i][j][1] == color}
+            path = walk_path(blob, [start], end) # the built in answers can touch themselves
+            if path is not None:
+                words.add("".join(answer[i][j][0] for i, j in path))
+    return words
+
+
+def category_of_file(path):
+    """returns the category a word file is named after, "words/disney_characters.txt" is "Disney Characters" """
+    name = os.path.splitext(os.path.basename(path))[0]
+    for category in CATEGORIES:
+        if file_name(category) == name:
+            return category
+    return name.replace("_", " ").title()
+
+
+def random_paths(size, colors, lengths, rng):
+    """covers a size x size grid with random paths that don't touch themselves, returns a list of paths
+    (lists of (row, column)) or None if the cover didn't end with the given number of paths of usable lengths"""
+    paths = {cell: [cell] for cell in ((i, j) for i in range(size) for j in range(size))} # id -> path, ids are cells
+    owner = {cell: cell for cell in paths}
+    longest = max(lengths)
+    while len(paths) > colors:
+        # every pair of path ends next to each other that could be joined, the shortest joined paths are tried
+        # first (in a random order) so the lengths stay even and the cover doesn't get stuck with short paths left
+        joins = []
+        for key, path in paths.items():
+            for end in {path[0], path[-1]}:
+                i, j = end
+                for cell in ((i-1, j), (i+1, j), (i, j-1), (i, j+1)):
+                    if cell in owner and owner[cell] != key:
+                        other = paths[owner[cell]]
+                        if (other[0] == cell or other[-1] == cell) and len(path) + len(other) <= longest:
+                            joins.append((len(path) + len(other), rng.random(), key, end, cell))
+        joins.sort()
+        for _, _, key, end, cell in joins:
+            path = paths[key]
+            other_key = owner[cell]
+            other = paths[other_key]
+            if not _touches(path, other, end, cell):
+                break
+        else:
+            return None # no two paths can be joined any more
+        first = path if path[-1] == end else path[::-1]
+        second = other if other[0] == cell else other[::-1]
+        paths[key] = first + second
+        del paths[other_key]
+        for moved in other:
+            owner[moved] = key
+    if len(paths) != colors or any(len(path) not in lengths for path in paths.values()):
+        return None
+    return list(paths.values())
+
+
+def _touches(path, other, end, cell):
+    # joining two paths at end and cell must not put any other cells of them next to each other
+    cells = set(path)
+    for i, j in other:
+        for near in ((i-1, j), (i+1, j), (i, j-1), (i, j+1)):
+            if near in cells and ((i, j), near) != (cell, end):
+                return True
+    return False
+
+
+def make_level(size, colors, words, category, rng):
+    """returns a random (LevelRecord, answer) with a unique solution, or None if this try didn't give one.
+    words is a dictionary length -> list of words"""
+    paths = random_paths(size, colors, words, rng)
+    if paths is None:
+        return None
+    letters = [[" "] * size for _ in range(size)]
+    cell_colors = [[DEFAULT_COLOR] * size for _ in range(size)]
+    for color, path in zip(rng.sample(COLORS, colors), paths):
+        if rng.random() < 0.5:
+            path.reverse()
+        for (i, j), letter in zip(path, rng.choice(words[len(path)])):
+            letters[i][j] = letter
+            cell_colors[i][j] = color
+    ends = {path[0]: True for path in paths} # True for the start of a word
+    ends.update((path[-1], False) for path in paths)
+
+    cells = []
+    for i in range(size):
+        row = []
+        for j in range(size):
+            if (i, j) not in ends:
+                row.append(CellRecord(" ", DEFAULT_COLOR, True, True))
+            elif ends[(i, j)]: # the given letter
+                row.append(CellRecord(letters[i][j].upper(), cell_colors[i][j], False, False))
+            else:
+                row.append(CellRecord(" ", cell_colors[i][j], True, False))
+        cells.append(tuple(row))
+    record = LevelRecord(category, tuple(cells))
+    if not is_unique(board_of(record), touching = True):
+        return None
+    answer = tuple(tuple((letters[i][j], cell_colors[i][j]) for j in range(size)) for i in range(size))
+    return record, answer
+
+
+def _make_chunk(task):
+    # runs in a worker process, returns (levels, tries), with fewer levels than count if max_tries ran out
+    size, colors, words, category, count, seed, max_tries = task
+    rng = random.Random(seed)
+    made = []
+    tries = 0
+    failed = 0 # tries since the last level made
+    while len(made) < count and failed < max_tries:
+        tries += 1
+        failed += 1
+        level = make_level(size, colors, words, category, rng)
+        if level is not None:
+            made.append(level)
+            failed = 0
+    return made, tries
+
+
+def generate(size, colors, words, category, count, workers = None, seed = None, max_tries = MAX_TRIES):
+    """makes count levels on a pool of workers, returns (levels, answers, tries).
+    The same seed gives the same levels whatever the number of workers. Raises ValueError if max_tries layouts in a
+    row don't give a level, some sizes and word lengths have no level with a unique solution"""
+    if not 1 <= colors <= len(COLORS):
+        raise ValueError(f"the number of colors must be between 1 and {len(COLORS)}")
+    by_length = {}
+    for word in sorted(words):
+        if len(word) >= MIN_LENGTH and word.isalpha():
+            by_length.setdefault(len(word), []).append(word)
+    if not by_length:
+        raise ValueError(f"no words of at least {MIN_LENGTH} letters")
+    if size*size > colors*max(by_length) or size*size < colors*min(by_length):
+        raise ValueError(f"{colors} paths of {min(by_length)} to {max(by_length)} letters can't fill a {size}x{size} grid")
+    if seed is None:
+        seed = random.randrange(2**32)
+    tasks = [(size, colors, by_length, category, min(CHUNK, count - start), seed*100003 + start, max_tries)
+             for start in range(0, count, CHUNK)]
+    levels = []
+    answers = []
+    tries = 0
+    with ProcessPoolExecutor(workers) as pool:
+        for made, chunk_tries in pool.map(_make_chunk, tasks):
+            for record, answer in made:
+                levels.append(record)
+                answers.append(answer)
+            tries += chunk_tries
+    if len(levels) < count:
+        raise ValueError(f"gave up after {max_tries} layouts in a row without a level with a unique solution "
+                         f"({len(levels)} of {count} levels made), try another --size, --colors or word list")
+    return levels, answers, tries
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Generate random Word-Flow levels with a unique solution")
+    parser.add_argument("--size", type = int, default = 5, help = "rows and columns of the grid")
+    parser.add_argument("--colors", type = int, default = 4, help = "number of paths")
+    parser.add_argument("--count", type = int, default = 100, help = "number of levels")
+    parser.add_argument("--category", default = None, help = "category of the levels, also picks the built in words used. "
+                        "Needed unless --words is given, whose file name is the category by default")
+    parser.add_argument("--words", help = "file with one word per line, by default the word list of the category "
+                        "(or the words of its built in answers)")
+    parser.add_argument("-o", "--output", default = "generated.wfp")
+    parser.add_argument("--json", nargs = 2, metavar = ("GRID", "ANSWERS"), help = "also write the levels as json files")
+    parser.add_argument("--workers", type = int, default = None, help = "number of processes, one per cpu by default")
+    parser.add_argument("--seed", type = int, default = None)
+    parser.add_argument("--max-tries", type = int, default = MAX_TRIES,
+                        help = "layouts tried in a row without making a level before giving up")
+    args = parser.parse_args()
+
+    if args.category is None:
+        if not args.words:
+            parser.error("give the category of the levels with --category, or a word file with --words")
+        args.category = category_of_file(args.words)
+    if args.words:
+        words = read_words(args.words)
+    elif args.category and for_category(args.category) is not None:
+        words = set(for_category(args.category))
+    else:
+        words = words_of(*open_levels(), args.category)
+        if not words:
+            parser.error(f"no built in words for the category {args.category!r}, give a word file with --words")
+    start = time.perf_counter()
+    try:
+        levels, answers, tries = generate(args.size, args.colors, words, args.category, args.count,
+                                          args.workers, args.seed, args.max_tries)
+    except ValueError as error:
+        parser.error(str(error))
+    elapsed = time.perf_counter() - start
+    write_pack(args.output, levels, answers)
+    if args.json:
+        write_json(levels, answers, *args.json)
+    print(f"wrote {len(levels)} levels to {args.output} in {elapsed:.2f}s, {len(levels)/elapsed:.1f} levels/s "
+          f"({tries} layouts tried, {os.cpu_count() if args.workers is None else args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
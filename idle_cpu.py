@@ -0,0 +1,47 @@
+"""Summary: This file measures how much CPU the game uses while nobody is playing.
+It starts game.py with the dummy video driver (so no window is needed), lets it sit on its first screen
+for a few seconds and reports the CPU time the game process used as a percentage of one core.
+
+usage: python idle_cpu.py [--seconds 5] [--script game.py] [game arguments, e.g. --fps 30]"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+
+def measure(script, seconds, game_args = ()):
+    """runs the script for the given number of seconds and returns the share of one core it used (0.0 - 1.0)"""
+    env = dict(os.environ, SDL_VIDEODRIVER = "dummy", SDL_AUDIODRIVER = "dummy", PYGAME_HIDE_SUPPORT_PROMPT = "1")
+    process = subprocess.Popen([sys.executable, script, *game_args], env = env, cwd = os.path.dirname(os.path.abspath(script)))
+    time.sleep(1) # startup (loading images and levels) isn't idle time
+    if process.poll() is not None:
+        raise RuntimeError(f"{script} exited with code {process.returncode} before it could be measured")
+    start = _cpu_seconds(process.pid)
+    time.sleep(seconds)
+    used = _cpu_seconds(process.pid) - start
+    process.send_signal(signal.SIGTERM)
+    process.wait()
+    return used / seconds
+
+
+def _cpu_seconds(pid):
+    """user + system CPU time of a running process, read from /proc"""
+    with open(f"/proc/{pid}/stat") as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Measure the idle CPU usage of the game")
+    parser.add_argument("--seconds", type = float, default = 5)
+    parser.add_argument("--script", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game.py"))
+    args, game_args = parser.parse_known_args()
+    usage = measure(args.script, args.seconds, game_args)
+    print(f"idle CPU: {usage*100:.1f}% of one core over {args.seconds:g}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Summary: This file contains the class Journal which saves the progress of a game as it is played.
+Every change the engine makes (a cell's color or letter, a new level) is appended to a journal file as one json line
+by a background thread, so saving never slows a frame down. The thread also folds the changes into the current state
+(the level and the color and letter of every changed cell) and every so often rewrites the file as a single snapshot
+of that state, so the journal stays small and resuming only replays a few lines.
+
+journal lines: ["s", level, answers shown, [[i, j, color], ...], [[i, j, letter], ...]] a snapshot, always first
+               ["v", level, answers shown] a new board for a level
+               ["c", i, j, color] and ["l", i, j, letter] a changed cell
+
+usage: python journal.py [FILE]   prints the progress saved in FILE (progress.journal by default)"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+
+
+_CLOSE = object() # put on the queue to stop the writer
+
+
+class _State:
+    """the progress in a journal: the level and the cells changed since it was loaded"""
+    def __init__(self, level = 0, answers_shown = False):
+        self.level = level
+        self.answers_shown = answers_shown
+        self.colors = {} # (i, j) -> color
+        self.letters = {} # (i, j) -> letter
+
+    def apply(self, entry):
+        kind = entry[0]
+        if kind == "c":
+            self.colors[entry[1], entry[2]] = entry[3]
+        elif kind == "l":
+            self.letters[entry[1], entry[2]] = entry[3]
+        elif kind == "v":
+            self.__init__(entry[1], entry[2])
+        elif kind == "s":
+            self.__init__(entry[1], entry[2])
+            self.colors = {(i, j): color for i, j, color in entry[3]}
+            self.letters = {(i, j): letter for i, j, letter in entry[4]}
+
+    def snapshot(self):
+        return ["s", self.level, self.answers_shown, [[i, j, color] for (i, j), color in self.colors.items()],
+                [[i, j, letter] for (i, j), letter in self.letters.items()]]
+
+
+def parse_snapshot(snapshot):
+    """returns the _State of a snapshot line"""
+    state = _State()
+    state.apply(snapshot)
+    return state
+
+
+def read_journal(path):
+    """returns the _State saved in the journal at path, or None if there is no journal"""
+    if not os.path.exists(path):
+        return None
+    state = _State()
+    with open(path, "r") as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError: # the last line is cut short if the game was killed while it was written
+                break
+            state.apply(entry)
+    return state
+
+
+def state_of(engine):
+    """returns the _State of the engine: its level and the cells changed since the level was loaded"""
+    state = _State(engine.current_level, engine.answers_shown)
+    if engine.is_finished():
+        return state
+    cleared = engine.board.copy()
+    cleared.clear()
+    grid = engine.board.GetBoard()
+    for i, j in engine.board.differences(cleared):
+        character = grid[i][j]
+        if character.get_color_change():
+            state.colors[i, j] = character.GetColor()
+        if character.get_has_text():
+            state.letters[i, j] = character.get_letter()
+    return state
+
+
+def restore(engine, state):
+    """loads the level of a _State on the engine and changes its cells to match, returns False if the level doesn't exist"""
+    if not 0 <= state.level <= engine.last_level:
+        return False
+    if state.level == engine.last_level: # every level was solved
+        engine.current_level = engine.last_level
+        return True
+    engine.load_level(state.level, show_answers = state.answers_shown)
+    rows, columns = engine.board.size()
+    for (i, j), color in state.colors.items():
+        if i < rows and j < columns: # the levels may have been edited since the state was saved
+            engine.set_color(i, j, color)
+    for (i, j), letter in state.letters.items():
+        if i < rows and j < columns:
+            engine.set_letter(i, j, letter)
+    return True
+
+
+class Journal:
+    """Class that records the changes of an Engine in a journal file from a background thread"""
+    def __init__(self, path = "progress.journal", compact_every = 500):
+        self.path = path
+        self.compact_every = compact_every # changes written between two snapshots
+        self.state = read_journal(path) # the saved progress, None for a new player
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def resume(self, engine):
+        """puts the saved progress on the engine's board and starts recording the engine's changes.
+        Returns True if there was progress to restore"""
+        restored = self.state is not None and restore(engine, self.state)
+        self.state = state_of(engine)
+        engine.journal = self
+        self._thread = threading.Thread(target = self._write, name = "journal", daemon = True)
+        self._thread.start()
+        self._queue.put(None) # the first thing written is a snapshot of the restored board
+        return restored
+
+    def record(self, entry):
+        """queues a change to be written, called by the engine"""
+        self._queue.put(entry)
+
+    def close(self):
+        """writes the changes still queued and a last snapshot, then stops the writer"""
+        if self._thread is not None:
+            self._queue.put(_CLOSE)
+            self._thread.join()
+            self._thread = None
+
+    def _write(self):
+        # runs on the writer thread, None on the queue asks for a snapshot
+        file = None
+        written = 0
+        closing = False
+        while not closing:
+            entries = [self._queue.get()]
+            while True: # everything queued by now goes out in one write
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            snapshot = file is None
+            for entry in entries:
+                if entry is _CLOSE:
+                    closing = True
+                elif entry is None:
+                    snapshot = True
+                else:
+                    self.state.apply(entry)
+                    lines.append(json.dumps(entry))
+            written += len(lines)
+            if snapshot or closing or written >= self.compact_every:
+                if file is not None:
+                    file.close()
+                file = self._compact()
+                written = 0
+            elif lines:
+                file.write("\n".join(lines) + "\n")
+                file.flush()
+        file.close()
+
+    def _compact(self):
+        # replaces the journal with a snapshot of the state, returns the new file opened for appending
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as file:
+            file.write(json.dumps(self.state.snapshot()) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path) # a crash leaves either the old journal or the new one, never half of it
+        return open(self.path, "a")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Print the progress saved in a journal")
+    parser.add_argument("file", nargs = "?", default = "progress.journal")
+    args = parser.parse_args()
+    state = read_journal(args.file)
+    if state is None:
+        print(f"{args.file} doesn't exist")
+    else:
+        print(f"level {state.level + 1}{' (answers shown)' if state.answers_shown else ''}: "
+              f"{len(state.colors)} colored cells, {len(state.letters)} letters")
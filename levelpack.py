@@ -0,0 +1,240 @@
+"""Summary: This file contains the compiler and the reader for level packs, a packed binary form of "grid.json" and "answers.json".
+A pack starts with a header, then has the data of every level, a table of the strings used (letters, colors and categories)
+and an index with the offset of each level. LevelPack maps the file with mmap and only decodes a level when it is asked for,
+so opening a pack with tens of thousands of levels costs the same as opening one with 11.
+
+usage: python levelpack.py build grid.json [answers.json] [-o levels.wfp] [--category NAME ...]
+       python levelpack.py verify levels.wfp grid.json [answers.json]
+       python levelpack.py info levels.wfp"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from functools import lru_cache
+
+from levels import CellRecord, LevelRecord, read_levels, read_answers
+
+
+MAGIC = b"WFLP"
+VERSION = 1
+HAS_ANSWERS = 1 # header flag
+
+# magic, version, flags, number of levels, offset of the string table, offset of the index
+HEADER = struct.Struct("<4sHHIQQ")
+# category string id, rows, columns
+LEVEL = struct.Struct("<HHH")
+# flags (1 = has_text, 2 = color_change), letter id, color id, answer letter id, answer color id
+CELL = struct.Struct("<BHHHH")
+NO_STRING = 0xFFFF # string id used for the answer of a pack without answers
+
+
+def write_pack(path, levels, answers = None):
+    """writes the LevelRecord objects in levels (and their answers, if given) to a pack file at path"""
+    if answers is not None and len(answers) != len(levels):
+        raise ValueError(f"{len(levels)} levels but {len(answers)} answers")
+    strings = {} # string -> id
+    def string_id(text):
+        if text not in strings:
+            if len(strings) == NO_STRING:
+                raise ValueError("too many different strings for one pack")
+            strings[text] = len(strings)
+        return strings[text]
+
+    blobs = []
+    for index in range(len(levels)):
+        cells = levels[index].cells
+        rows = len(cells)
+        columns = len(cells[0]) if rows else 0
+        blob = [LEVEL.pack(string_id(levels[index].category), rows, columns)]
+        for i in range(rows):
+            if len(cells[i]) != columns:
+                raise ValueError(f"level {index+1} is not rectangular")
+            for j in range(columns):
+                cell = cells[i][j]
+                flags = (1 if cell.has_text else 0) | (2 if cell.color_change else 0)
+                if answers is None:
+                    answer_letter = answer_color = NO_STRING
+                else:
+                    answer_letter = string_id(answers[index][i][j][0])
+                    answer_color = string_id(answers[index][i][j][1])
+                blob.append(CELL.pack(flags, string_id(cell.letter), string_id(cell.color), answer_letter, answer_color))
+        blobs.append(b"".join(blob))
+
+    offsets = []
+    position = HEADER.size
+    for blob in blobs:
+        offsets.append(position)
+        position += len(blob)
+    offsets.append(position) # end of the last level
+    string_table = [struct.pack("<I", len(strings))]
+    for text in strings: # dictionaries keep insertion order, which is the id order
+        encoded = text.encode("utf-8")
+        string_table.append(struct.pack("<H", len(encoded)) + encoded)
+    string_table = b"".join(string_table)
+    index_offset = position + len(string_table)
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, HAS_ANSWERS if answers is not None else 0, len(levels), position, index_offset))
+        for blob in blobs:
+            file.write(blob)
+        file.write(string_table)
+        file.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+
+
+class LevelPack:
+    """Class that reads levels from a pack file on demand.
+    levels and answers are read only sequences that decode a level the first time it is used"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, flags, self._count, strings_offset, self._index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a level pack")
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} level pack, only version {VERSION} can be read")
+        self.has_answers = bool(flags & HAS_ANSWERS)
+
+        # the string table is small (colors, letters and categories), so it is decoded up front
+        count, = struct.unpack_from("<I", self._map, strings_offset)
+        position = strings_offset + 4
+        self._strings = []
+        for _ in range(count):
+            length, = struct.unpack_from("<H", self._map, position)
+            self._strings.append(sys.intern(self._map[position+2:position+2+length].decode("utf-8")))
+            position += 2 + length
+
+        # the most recently used levels are kept decoded, the game asks for the current one every frame
+        self.level = lru_cache(maxsize = 64)(self._level)
+        self.answer = lru_cache(maxsize = 64)(self._answer)
+        self.levels = _Records(self, self.level)
+        self.answers = _Records(self, self.answer) if self.has_answers else None
+
+    def __len__(self):
+        return self._count
+
+    def _cells(self, index):
+        """returns (category, rows, columns, cells) of the level at index, cells being a flat list of CELL tuples"""
+        if not 0 <= index < self._count:
+            raise IndexError("level index out of range")
+        start, end = struct.unpack_from("<2Q", self._map, self._index_offset + index*8)
+        category, rows, columns = LEVEL.unpack_from(self._map, start)
+        cells = list(CELL.iter_unpack(self._map[start+LEVEL.size:end]))
+        return self._strings[category], rows, columns, cells
+
+    def _level(self, index):
+        """returns the LevelRecord of the level at index"""
+        category, rows, columns, cells = self._cells(index)
+        strings = self._strings
+        return LevelRecord(category, tuple(
+            tuple(CellRecord(strings[letter], strings[color], bool(flags & 1), bool(flags & 2))
+                  for flags, letter, color, _, _ in cells[i*columns:(i+1)*columns]) for i in range(rows)))
+
+    def _answer(self, index):
+        """returns the answer of the level at index as a tuple of rows of (lowercase letter, color) tuples"""
+        if not self.has_answers:
+            raise ValueError(f"{self.path} has no answers")
+        _, rows, columns, cells = self._cells(index)
+        strings = self._strings
+        return tuple(tuple((strings[letter], strings[color]) for _, _, _, letter, color in cells[i*columns:(i+1)*columns])
+                     for i in range(rows))
+
+    def close(self):
+        self._map.close()
+
+
+class _Records(Sequence):
+    """read only list of the levels or answers of a pack"""
+    def __init__(self, pack, get):
+        self._pack = pack
+        self._get = get
+
+    def __len__(self):
+        return len(self._pack)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self._get(index)
+
+
+def is_up_to_date(pack_path, *sources):
+    """returns True if the pack exists and none of the json files it was built from were changed after it"""
+    if not os.path.exists(pack_path):
+        return False
+    built = os.path.getmtime(pack_path)
+    return all(os.path.getmtime(source) <= built for source in sources if os.path.exists(source))
+
+
+def verify(pack_path, grid_json, answers_json = None):
+    """compares a pack with the json files it was built from, returns a list of the differences found"""
+    pack = LevelPack(pack_path)
+    levels = read_levels(grid_json)
+    problems = []
+    if len(pack) != len(levels):
+        problems.append(f"pack has {len(pack)} levels, {grid_json} has {len(levels)}")
+    for index in range(min(len(pack), len(levels))):
+        if pack.level(index) != levels[index]:
+            problems.append(f"level {index+1} differs from {grid_json}")
+    if answers_json is not None:
+        answers = read_answers(answers_json)
+        if not pack.has_answers:
+            problems.append("pack has no answers")
+        else:
+            for index in range(min(len(pack), len(answers))):
+                if pack.answer(index) != answers[index]:
+                    problems.append(f"answer {index+1} differs from {answers_json}")
+    pack.close()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compile, check and inspect Word-Flow level packs")
+    commands = parser.add_subparsers(dest = "command", required = True)
+    build = commands.add_parser("build", help = "compile json levels (and answers) into a pack")
+    build.add_argument("grid")
+    build.add_argument("answers", nargs = "?")
+    build.add_argument("-o", "--output", default = "levels.wfp")
+    build.add_argument("--category", action = "append", help = "category of each level in order, replaces the built in list")
+    check = commands.add_parser("verify", help = "check that a pack matches the json files it was built from")
+    check.add_argument("pack")
+    check.add_argument("grid")
+    check.add_argument("answers", nargs = "?")
+    info = commands.add_parser("info", help = "print a summary of a pack")
+    info.add_argument("pack")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        levels = read_levels(args.grid)
+        if args.category:
+            if len(args.category) != len(levels):
+                parser.error(f"{len(args.category)} categories given for {len(levels)} levels")
+            levels = [level._replace(category = category) for level, category in zip(levels, args.category)]
+        answers = read_answers(args.answers) if args.answers else None
+        write_pack(args.output, levels, answers)
+        print(f"wrote {len(levels)} levels to {args.output}")
+    elif args.command == "verify":
+        if args.answers:
+            problems = verify(args.pack, args.grid, args.answers)
+        else:
+            problems = verify(args.pack, args.grid)
+        for problem in problems:
+            print(problem)
+        if problems:
+            sys.exit(1)
+        print(f"{args.pack} matches {args.grid}" + (f" and {args.answers}" if args.answers else ""))
+    else:
+        pack = LevelPack(args.pack)
+        print(f"{len(pack)} levels, answers: {'yes' if pack.has_answers else 'no'}")
+        for index in range(len(pack)):
+            level = pack.level(index)
+            print(f"{index+1}: {level.category} ({len(level.cells)}x{len(level.cells[0]) if level.cells else 0})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Summary: This file reads the level descriptions ("grid.json") and the answers ("answers.json") into plain data.
+A level is a LevelRecord holding its category and a grid of CellRecord tuples, an answer is a grid of
+(lowercase letter, color) tuples. No pygame objects are made here, the game only builds the Character and Button
+objects of a level once that level is being played.
+A level in a json file is either a grid (a list of rows of cells, its category is taken from CATEGORIES by its index)
+or {"category": name, "grid": grid} as written by write_json."""
+
+import json
+import sys
+from collections import namedtuple
+
+from board import Board
+
+
+# categories of the built in levels, in the same order as the levels in the json files
+CATEGORIES = ["Warm Up (In At)", "Actions", "Shapes", "Colors", "Sports", "Onomatopoeia","Streaming Services" ,\
+              "Animals", "Companies", "Food", "Disney Characters" ]
+
+# one cell of a level as it is stored in the json file
+CellRecord = namedtuple("CellRecord", ["letter", "color", "has_text", "color_change"])
+
+# one level, cells is a tuple of rows (in the order of the json file) of CellRecord
+LevelRecord = namedtuple("LevelRecord", ["category", "cells"])
+
+
+def category_of(index):
+    """returns the category of the level at the given index"""
+    if index < len(CATEGORIES):
+        return CATEGORIES[index]
+    return "n/a"
+
+
+def read_levels(json_file):
+    """returns the list of LevelRecord described by a json file such as "grid.json",
+    a file with a single grid (like the "currLevel.json" written by main.py) gives a list with one level"""
+    return [level_of(index, grid) for index, grid in enumerate(read_grids(json_file))]
+
+
+def read_answers(json_file):
+    """returns the list of answers described by a json file such as "answers.json",
+    each answer is a tuple of rows of (lowercase letter, color) tuples"""
+    return [answer_of_grid(grid) for grid in read_grids(json_file)]
+
+
+def level_of(index, grid):
+    """makes the LevelRecord of the level at index from its grid as read from the json file"""
+    if isinstance(grid, dict):
+        return LevelRecord(grid["category"], _cells(grid["grid"]))
+    return LevelRecord(category_of(index), _cells(grid))
+
+
+def answer_of_grid(grid):
+    """makes an answer from its grid as read from the json file"""
+    if isinstance(grid, dict):
+        grid = grid["grid"]
+    return answer_of(_cells(grid))
+
+
+def board_of(record):
+    """makes a Board (without buttons) for a LevelRecord"""
+    return Board.from_cells(record.cells, record.category)
+
+
+def answer_of(cells):
+    """turns a grid of CellRecord into the compact form used to check answers"""
+    return tuple(tuple((cell.letter.lower(), cell.color) for cell in row) for row in cells)
+
+
+def write_json(levels, answers, grid_file, answers_file):
+    """writes levels and their answers in the format of "grid.json" and "answers.json",
+    with the category of each level kept next to its grid"""
+    grids = []
+    answer_grids = []
+    for record, answer in zip(levels, answers):
+        grids.append({"category": record.category,
+                      "grid": [[_item(cell.letter, cell.color, cell) for cell in row] for row in record.cells]})
+        answer_grids.append([[_item(cell.letter if not cell.has_text else answer[i][j][0], answer[i][j][1], cell)
+                              for j, cell in enumerate(row)] for i, row in enumerate(record.cells)])
+    with open(grid_file, "w") as file:
+        json.dump(grids, file, indent = 4)
+    with open(answers_file, "w") as file:
+        json.dump(answer_grids, file, indent = 4)
+
+
+def _item(letter, color, cell):
+    # one cell as written by main.py
+    return {"letter": letter, "color": color, "button": "na", "has_text": cell.has_text, "color_change": cell.color_change}
+
+
+def read_grids(json_file):
+    """returns the grids of a json file as they are written in it, a level pack is a list of grids
+    and main.py writes a single grid"""
+    with open(json_file, "r") as file:
+        data = json.load(file)
+    if isinstance(data, dict) or (data and isinstance(data[0], list) and data[0] and isinstance(data[0][0], dict)):
+        return [data]
+    return data
+
+
+def _cells(grid):
+    # the same color names repeat in every cell, interning them keeps one copy of each
+    return tuple(tuple(CellRecord(item['letter'], sys.intern(item['color']), item['has_text'], item['color_change'])
+                       for item in row) for row in grid)
@@ -0,0 +1,154 @@
+"""Summary: This file contains the class LevelWatcher which reloads the level files while the game is running.
+It is meant for designing levels: run the game with --watch and every time "grid.json" or "answers.json" is saved the
+edited levels show up in the game without restarting it. A background thread checks the time stamps of the files a few
+times a second, and when one of them changed it reads the file again and hashes each grid, so only the levels whose
+grid (or answer) really changed are turned into new records. The others keep the records they had, so the boards and
+buttons already made for them are still good. The game is told through a callback, and takes the new lists with take.
+Run on its own it prints the levels that change and the problems lint.py finds in them.
+
+usage: python levelwatch.py [grid.json [answers.json]]"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+from levels import read_grids, level_of, answer_of_grid
+
+
+def _digest(grid):
+    # the same grid always gives the same digest, however the file was indented
+    return hashlib.blake2b(json.dumps(grid, sort_keys = True, separators = (",", ":")).encode(), digest_size = 16).digest()
+
+
+class _WatchedFile:
+    """a level file, the digest of each of its grids and what was made of each grid"""
+    def __init__(self, path, parse):
+        self.path = path
+        self.parse = parse # (index, grid) -> level record or answer
+        self.stamp = None # (modification time, size) when the file was last read
+        self.digests = []
+        self.items = []
+
+    def reload(self):
+        """reads the file again if it changed, returns the indexes of the grids that changed or None if the file didn't"""
+        try:
+            status = os.stat(self.path)
+            stamp = (status.st_mtime_ns, status.st_size)
+            if stamp == self.stamp:
+                return None
+            grids = read_grids(self.path)
+        except (OSError, ValueError): # missing, or half written by the editor, it is read again on the next check
+            return None
+        self.stamp = stamp
+        digests = [_digest(grid) for grid in grids]
+        items = self.items[:len(grids)]
+        changed = []
+        for index, (digest, grid) in enumerate(zip(digests, grids)):
+            if index >= len(self.digests) or self.digests[index] != digest:
+                if index < len(items):
+                    items[index] = self.parse(index, grid)
+                else:
+                    items.append(self.parse(index, grid))
+                changed.append(index)
+        changed.extend(range(len(grids), len(self.digests))) # levels that were removed
+        self.digests = digests
+        self.items = items
+        return changed
+
+
+class LevelWatcher:
+    """Class that keeps the levels and answers of two json files up to date with the files"""
+    def __init__(self, json_file = "grid.json", json_answer = "answers.json", every = 0.25):
+        self.every = every # seconds between two checks of the files
+        self._levels = _WatchedFile(json_file, level_of)
+        self._answers = _WatchedFile(json_answer, lambda index, grid: answer_of_grid(grid))
+        self._changed = set() # indexes of the levels changed since the last take
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.check()
+        for watched in (self._levels, self._answers):
+            if watched.stamp is None:
+                raise ValueError(f"{watched.path} can't be read")
+        if len(self.levels) != len(self.answers):
+            raise ValueError(f"{json_file} has {len(self.levels)} levels but {json_answer} has {len(self.answers)} answers")
+        self._changed.clear()
+
+    @property
+    def levels(self):
+        return self._levels.items
+
+    @property
+    def answers(self):
+        return self._answers.items
+
+    def check(self):
+        """reads the files that changed since the last check, returns True if it found changed levels that can be taken.
+        Changes are held back while the files don't have as many levels as answers, one of them is still being edited"""
+        with self._lock:
+            found = False
+            for watched in (self._levels, self._answers):
+                changed = watched.reload()
+                if changed:
+                    self._changed.update(changed)
+                    found = True
+            return found and len(self.levels) == len(self.answers)
+
+    def take(self):
+        """returns (levels, answers, set of the indexes of the levels changed since the last take)"""
+        with self._lock:
+            if len(self.levels) != len(self.answers):
+                return self.levels, self.answers, set()
+            changed = self._changed
+            self._changed = set()
+            return list(self.levels), list(self.answers), changed
+
+    def start(self, notify):
+        """checks the files every self.every seconds on a background thread, calling notify() when levels changed"""
+        def watch():
+            while not self._stop.wait(self.every):
+                if self.check():
+                    notify()
+        self._thread = threading.Thread(target = watch, name = "level watcher", daemon = True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Print the levels that change as the level files are edited")
+    parser.add_argument("levels", nargs = "?", default = "grid.json")
+    parser.add_argument("answers", nargs = "?", default = "answers.json")
+    args = parser.parse_args()
+    from lint import lint_level # only needed here
+
+    watcher = LevelWatcher(args.levels, args.answers)
+    print(f"watching {args.levels} and {args.answers}, {len(watcher.levels)} levels (ctrl+c to stop)")
+    try:
+        while True:
+            time.sleep(watcher.every)
+            start = time.perf_counter()
+            if not watcher.check():
+                continue
+            levels, answers, changed = watcher.take()
+            print(f"{len(changed)} levels changed, reloaded in {(time.perf_counter() - start)*1000:.1f}ms")
+            for index in sorted(changed):
+                if index >= len(levels):
+                    print(f"  level {index + 1}: removed")
+                    continue
+                problems = lint_level(index, levels[index], answers[index])
+                print(f"  level {index + 1}: " + ("ok" if not problems else
+                                                   "; ".join(f"{problem.severity}: {problem.message}" for problem in problems)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
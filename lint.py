@@ -0,0 +1,220 @@
+"""Summary: This file checks that the levels of a pack agree with their answers and categories.
+The levels, the answers and the categories are separate lists only matched up by their index, so a level can easily
+end up with the wrong answer or no category. For every level it checks that:
+    - the level has a category and an answer of the same size as its grid
+    - the given letters and the path ends are the same in the grid and in the answer
+    - every color has exactly two ends, and every color of the answer has ends in the grid
+    - the cells of each color in the answer form one 4-connected path from one end to the other
+    - every cell of the answer is part of a path and has a letter
+and warns about paths whose word isn't in the category's word list (and, with --unique, about puzzles that don't have
+exactly one solution). The levels are split in chunks checked by a pool of processes, a pack file is opened by each
+process on its own so only the problems found are sent back.
+
+usage: python lint.py [levels.wfp | grid.json [answers.json]] [--workers N] [--unique] [--quiet]"""
+
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from board import DEFAULT_COLOR
+from dictionary import for_category
+from levelpack import LevelPack
+from levels import CATEGORIES, board_of, category_of, read_levels, read_answers
+from paths import MAX_SEARCH
+from solver import solve
+
+
+ERROR = "error"
+WARNING = "warning"
+CHUNK = 250 # levels checked by a worker at a time
+
+# a problem found in a level, level is None for problems of the whole pack
+Problem = namedtuple("Problem", ["level", "severity", "message"])
+
+
+def _connected(cells, start):
+    # the cells of the set cells that can be reached from start through 4-adjacent cells of the set
+    seen = {start}
+    stack = [start]
+    while stack:
+        i, j = stack.pop()
+        for cell in ((i-1, j), (i+1, j), (i, j-1), (i, j+1)):
+            if cell in cells and cell not in seen:
+                seen.add(cell)
+                stack.append(cell)
+    return seen
+
+
+def _neighbors(cell, cells):
+    i, j = cell
+    return [other for other in ((i-1, j), (i+1, j), (i, j-1), (i, j+1)) if other in cells]
+
+
+def walk_path(cells, path, end):
+    """returns the cells in order along a path from path[0] to end that goes through all of them once, None if there is none"""
+    if path[-1] == end:
+        return list(path) if len(path) == len(cells) else None
+    for cell in _neighbors(path[-1], cells):
+        if cell not in path:
+            path.append(cell)
+            found = walk_path(cells, path, end)
+            if found is not None:
+                return found
+            path.pop()
+    return None
+
+
+def lint_level(index, record, answer, unique = False):
+    """returns the list of the problems of the level at index (counted from 0, reported from 1)"""
+    problems = []
+    def report(severity, message):
+        problems.append(Problem(index, severity, message))
+
+    if not record.category or record.category == "n/a":
+        report(ERROR, "has no category")
+    rows = len(record.cells)
+    columns = len(record.cells[0]) if rows else 0
+    if rows == 0 or any(len(row) != columns for row in record.cells):
+        report(ERROR, "grid is empty or its rows have different lengths")
+        return problems
+    if answer is None:
+        report(ERROR, "has no answer")
+        return problems
+    if len(answer) != rows or any(len(row) != columns for row in answer):
+        report(ERROR, f"answer is {len(answer)}x{len(answer[0]) if answer else 0} but the grid is {rows}x{columns}")
+        return problems
+
+    ends = {} # color -> ends in the grid
+    painted = {} # color -> cells of that color in the answer
+    unpainted = []
+    for i, row in enumerate(record.cells):
+        for j, cell in enumerate(row):
+            letter, color = answer[i][j]
+            if not cell.has_text and cell.letter.lower() != letter.lower():
+                report(ERROR, f"given letter at {(i, j)} is {cell.letter!r} in the grid but {letter!r} in the answer")
+            if cell.has_text and not letter.strip():
+                report(ERROR, f"cell {(i, j)} has no letter in the answer")
+            if not cell.color_change:
+                if cell.color != color:
+                    report(ERROR, f"path end at {(i, j)} is {cell.color} in the grid but {color} in the answer")
+                if cell.color != DEFAULT_COLOR:
+                    ends.setdefault(cell.color, []).append((i, j))
+            if color == DEFAULT_COLOR:
+                unpainted.append((i, j))
+            else:
+                painted.setdefault(color, set()).add((i, j))
+    if unpainted:
+        report(ERROR, f"{len(unpainted)} cells of the answer aren't part of any path, the first one is {unpainted[0]}")
+    for color in sorted(set(painted) - set(ends)):
+        report(ERROR, f"{color} is in the answer but has no ends in the grid")
+
+    dictionary = for_category(record.category)
+    for color, cells in sorted(ends.items()):
+        if len(cells) != 2:
+            report(ERROR, f"{color} has {len(cells)} ends instead of 2")
+            continue
+        blob = painted.get(color, set())
+        reached = _connected(blob, cells[0])
+        if cells[1] not in reached:
+            report(ERROR, f"the {color} path of the answer doesn't connect its ends {cells[0]} and {cells[1]}")
+            continue
+        if len(reached) != len(blob):
+            report(ERROR, f"{len(blob) - len(reached)} {color} cells of the answer aren't connected to its path")
+            continue
+        start, end = cells if not record.cells[cells[0][0]][cells[0][1]].has_text else cells[::-1] # the word starts at the given letter
+        if len(blob) > MAX_SEARCH and any(len(_neighbors(cell, blob)) > 2 for cell in blob):
+            continue # a big path that runs next to itself is too slow to walk, its cells are connected which is what the game needs
+        path = walk_path(blob, [start], end)
+        if path is None:
+            report(ERROR, f"the {color} cells of the answer can't be walked from end to end as one path")
+        elif dictionary is not None:
+            word = "".join(answer[i][j][0].lower() for i, j in path)
+            if word not in dictionary:
+                report(WARNING, f"{color} spells {word!r}, which isn't in the {record.category} word list")
+
+    if unique and not any(problem.severity == ERROR for problem in problems):
+        solutions = len(solve(board_of(record), 2))
+        if solutions != 1:
+            report(WARNING, "has no solution without touching paths" if solutions == 0 else "has more than one solution")
+    return problems
+
+
+def _lint_chunk(task):
+    # runs in a worker process, returns the problems of a chunk of levels
+    source, start, stop, unique = task
+    if isinstance(source, str): # a pack file, opened here instead of sending the levels over
+        pack = LevelPack(source)
+        levels = pack.levels[start:stop]
+        answers = pack.answers[start:stop] if pack.answers is not None else [None] * (stop - start)
+        pack.close()
+    else:
+        levels, answers = source
+    problems = []
+    for offset, (record, answer) in enumerate(zip(levels, answers)):
+        problems.extend(lint_level(start + offset, record, answer, unique))
+    return problems
+
+
+def lint(path, answers_path = None, workers = None, unique = False):
+    """checks every level of a pack file or of json files, returns (number of levels, list of problems)"""
+    problems = []
+    if path.endswith(".json"):
+        levels = read_levels(path)
+        answers = read_answers(answers_path) if answers_path else [None] * len(levels)
+        if len(answers) != len(levels):
+            problems.append(Problem(None, ERROR, f"{path} has {len(levels)} levels but {answers_path} has {len(answers)} answers"))
+        # levels without a category are reported one by one
+        if 1 < len(levels) < len(CATEGORIES) and all(level.category == category_of(index) for index, level in enumerate(levels)):
+            problems.append(Problem(None, WARNING, f"there are {len(CATEGORIES)} built in categories for {len(levels)} levels"))
+        answers = list(answers) + [None] * (len(levels) - len(answers))
+        tasks = [((levels[start:start + CHUNK], answers[start:start + CHUNK]), start, min(start + CHUNK, len(levels)), unique)
+                 for start in range(0, len(levels), CHUNK)]
+        count = len(levels)
+    else:
+        pack = LevelPack(path)
+        count = len(pack)
+        if not pack.has_answers:
+            problems.append(Problem(None, ERROR, f"{path} has no answers"))
+        pack.close()
+        tasks = [(path, start, min(start + CHUNK, count), unique) for start in range(0, count, CHUNK)]
+    if len(tasks) <= 1: # not worth starting processes
+        for task in tasks:
+            problems.extend(_lint_chunk(task))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            for found in pool.map(_lint_chunk, tasks):
+                problems.extend(found)
+    return count, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Check that the levels of a pack agree with their answers and categories")
+    parser.add_argument("levels", nargs = "?", default = "grid.json", help = "a level pack or a json file of levels")
+    parser.add_argument("answers", nargs = "?", help = "json file of the answers (answers.json with grid.json)")
+    parser.add_argument("--workers", type = int, help = "processes to use (all the processors by default)")
+    parser.add_argument("--unique", action = "store_true", help = "also warn about puzzles without exactly one solution (slow)")
+    parser.add_argument("--quiet", action = "store_true", help = "only print the errors")
+    args = parser.parse_args()
+    answers = args.answers
+    if answers is None and os.path.basename(args.levels) == "grid.json":
+        answers = os.path.join(os.path.dirname(args.levels), "answers.json")
+
+    start = time.perf_counter()
+    count, problems = lint(args.levels, answers, args.workers, args.unique)
+    errors = sum(1 for problem in problems if problem.severity == ERROR)
+    for problem in problems:
+        if args.quiet and problem.severity != ERROR:
+            continue
+        where = f"{args.levels}" if problem.level is None else f"{args.levels}: level {problem.level + 1}"
+        print(f"{where}: {problem.severity}: {problem.message}")
+    print(f"{count} levels checked in {time.perf_counter() - start:.2f}s: "
+          f"{errors} errors, {len(problems) - errors} warnings")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Summary: This file contains the class PathIndex which keeps track of the color paths of a board as it is played.
+For every color it counts the cells, the pairs of neighboring cells of that color and the cells whose number of same
+colored neighbors is wrong for a path (1 for the two ends, 2 for the cells in between). Changing the color of a cell only
+updates the counts of that cell and its neighbors, so knowing which paths are complete and whether the grid is full
+costs the same on any board size. A color whose cells form a single path from end to end with nothing else touching it
+is complete as soon as the counts say so, a path that runs next to itself (like some of the built in answers) is
+confirmed with a small search over the cells of that color the first time it is asked for after a change."""
+
+from board import DEFAULT_COLOR
+from dictionary import NO_NODE
+
+
+MAX_SEARCH = 24 # largest group of cells of one color searched for a path that touches itself
+
+
+class PathIndex:
+    """Class with the path counts of a Board, update must be called after every change of color"""
+    def __init__(self, board):
+        self._board = board
+        self.grid = board.GetBoard()
+        self.rows = len(self.grid)
+        self.columns = len(self.grid[0]) if self.rows else 0
+        self.ends = {} # color -> [start, end], the start is the end with the given letter
+        for i in range(self.rows):
+            for j in range(self.columns):
+                character = self.grid[i][j]
+                if not character.get_color_change() and character.GetColor() != DEFAULT_COLOR:
+                    self.ends.setdefault(character.GetColor(), []).append((i, j))
+        for cells in self.ends.values():
+            if len(cells) == 2 and self.grid[cells[0][0]][cells[0][1]].get_has_text():
+                cells.reverse()
+        self.end_cells = {cell for cells in self.ends.values() for cell in cells}
+
+        self.cells = {color: 0 for color in self.ends} # number of cells of each color
+        self.edges = {color: 0 for color in self.ends} # pairs of neighbors of each color
+        self.wrong = {color: 0 for color in self.ends} # cells with a number of neighbors a path can't have
+        self.empty = 0 # cells without the color of a path, a color with no ends doesn't fill a cell
+        self._searched = {} # color -> result of the last search, dropped when a cell of that color changes
+        for i in range(self.rows):
+            for j in range(self.columns):
+                color = self.grid[i][j].GetColor()
+                if color not in self.cells:
+                    self.empty += 1
+                else:
+                    self.cells[color] += 1
+                    self.wrong[color] += self._is_wrong(i, j, color)
+                    # each pair is counted from its top or left cell
+                    self.edges[color] += sum(1 for i2, j2 in ((i+1, j), (i, j+1))
+                                             if i2 < self.rows and j2 < self.columns and self.grid[i2][j2].GetColor() == color)
+
+    def copy(self, board):
+        """returns the PathIndex of board, a copy of the board this index was made for (see Board.copy),
+        without counting its cells again"""
+        index = PathIndex.__new__(PathIndex)
+        index.__dict__.update(self.__dict__) # the ends never change, so they are shared
+        index.__dict__.pop("grid", None)
+        index._board = board
+        index.cells = dict(self.cells)
+        index.edges = dict(self.edges)
+        index.wrong = dict(self.wrong)
+        index._searched = dict(self._searched)
+        return index
+
+    def __getattr__(self, name):
+        # a copy only makes the views of its board's cells when it first needs them
+        if name == "grid":
+            self.grid = self._board.GetBoard()
+            return self.grid
+        raise AttributeError(name)
+
+    def _neighbors(self, i, j):
+        return [(i2, j2) for i2, j2 in ((i-1, j), (i+1, j), (i, j-1), (i, j+1)) if 0 <= i2 < self.rows and 0 <= j2 < self.columns]
+
+    def _is_wrong(self, i, j, color):
+        # a path's ends have one neighbor of its color, the cells in between two
+        same = sum(1 for i2, j2 in self._neighbors(i, j) if self.grid[i2][j2].GetColor() == color)
+        return same != (1 if (i, j) in self.end_cells else 2)
+
+    def update(self, i, j, old_color):
+        """updates the counts after the cell in row i and column j changed from old_color to its current color"""
+        new_color = self.grid[i][j].GetColor()
+        if new_color == old_color:
+            return
+        around = self._neighbors(i, j)
+        # the cell and its neighbors are taken out of the counts with their old color and put back with the new one
+        self.grid[i][j].SetColor(old_color)
+        self._count(i, j, around, -1)
+        self.grid[i][j].SetColor(new_color)
+        self._count(i, j, around, 1)
+        self._searched.pop(old_color, None)
+        self._searched.pop(new_color, None)
+
+    def _count(self, i, j, around, sign):
+        color = self.grid[i][j].GetColor()
+        if color not in self.cells:
+            self.empty += sign
+        else:
+            self.cells[color] += sign
+            self.wrong[color] += sign*self._is_wrong(i, j, color)
+            self.edges[color] += sign*sum(1 for i2, j2 in around if self.grid[i2][j2].GetColor() == color)
+        for i2, j2 in around:
+            other = self.grid[i2][j2].GetColor()
+            if other in self.cells:
+                self.wrong[other] += sign*self._is_wrong(i2, j2, other)
+
+    def is_complete(self, color):
+        """returns True if the cells of color form a single path from one of its ends to the other"""
+        cells = self.cells[color]
+        if len(self.ends[color]) != 2 or self.edges[color] < cells - 1:
+            return False # not even connected
+        if color not in self._searched:
+            if self.wrong[color] == 0 and self.edges[color] == cells - 1:
+                # a path that doesn't touch itself, unless some of the cells are a loop apart from it (a 2x2 block
+                # has as many pairs as cells, which makes up for the missing pair), so they must all be reached
+                self._searched[color] = self._reaches_all(color)
+            else:
+                self._searched[color] = cells <= MAX_SEARCH and self.path(color) is not None
+        return self._searched[color]
+
+    def _reaches_all(self, color):
+        # True if every cell of color can be reached from its start through neighbors of that color
+        start = self.ends[color][0]
+        seen = {start}
+        stack = [start]
+        while stack:
+            for cell in self._neighbors(*stack.pop()):
+                if cell not in seen and self.grid[cell[0]][cell[1]].GetColor() == color:
+                    seen.add(cell)
+                    stack.append(cell)
+        return len(seen) == self.cells[color]
+
+    def complete_colors(self):
+        """returns the set of the colors whose path is complete"""
+        return {color for color in self.ends if self.is_complete(color)}
+
+    def is_full(self):
+        """returns True if every cell has the color of one of the paths"""
+        return self.empty == 0
+
+    def path(self, color, word = None, dictionary = None):
+        """returns the cells of color in the order of a path from its start to its end, or None if there is no such path.
+        If word is given the letters along the path must spell it, if dictionary is given they must spell one of its words
+        (the walk through the dictionary stops as soon as no word starts with the letters read)"""
+        start, end = self.ends[color]
+        blob = {(i, j) for i in range(self.rows) for j in range(self.columns) if self.grid[i][j].GetColor() == color}
+        if word is not None and len(word) != len(blob):
+            return None
+        return self._walk(blob, [start], end, word, dictionary, dictionary.root if dictionary is not None else None)
+
+    def _walk(self, blob, path, end, word, dictionary, node):
+        i, j = path[-1]
+        letter = self.grid[i][j].get_letter().lower()
+        if word is not None and letter != word[len(path) - 1]:
+            return None
+        if dictionary is not None:
+            if len(letter) != 1 or letter.isspace(): # an erased or blank cell spells nothing
+                return None
+            node = dictionary.step(node, letter)
+            if node == NO_NODE:
+                return None
+        if path[-1] == end:
+            if len(path) != len(blob) or (dictionary is not None and not dictionary.is_word(node)):
+                return None
+            return list(path)
+        for cell in self._neighbors(i, j):
+            if cell in blob and cell not in path:
+                path.append(cell)
+                found = self._walk(blob, path, end, word, dictionary, node)
+                path.pop()
+                if found is not None:
+                    return found
+        return None
@@ -0,0 +1,126 @@
+"""Summary: This file contains the class Profiler which times the phases of each frame of the game.
+The game wraps its phases (handling events, drawing the level, pushing the display and so on) in profiler.phase and
+counts the surfaces it creates and the images it loads with profiler.count. Nothing is measured until the profiler is
+enabled, then the last frames are kept for the on screen summary (the HUD, toggled with "p") and, if tracing, every phase
+is also recorded as an event of a Chrome trace ("chrome://tracing" or https://ui.perfetto.dev can open the file)."""
+
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+
+class _Phase:
+    """context manager that adds the time spent inside it to a phase of the current frame"""
+    __slots__ = ["profiler", "name", "start"]
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exception):
+        end = time.perf_counter_ns()
+        self.profiler._add(self.name, self.start, end)
+        return False
+
+
+class _NoPhase:
+    """context manager used while the profiler is disabled, it does nothing"""
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class Profiler:
+    """Class with the phase times and counters of the last frames and the events of the trace being recorded"""
+    def __init__(self, history = 120, max_events = 500000):
+        self.enabled = False
+        self.tracing = False
+        self.history = deque(maxlen = history) # (phase -> ns, counters, frame ns) of the last frames
+        self.max_events = max_events # the trace stops growing after this many events
+        self.events = []
+        self._phases = Counter() # phase -> ns spent in it during the current frame
+        self._counters = Counter() # counter -> times counted during the current frame
+        self._totals = Counter() # counter -> times counted since the profiler was enabled
+        self._frame_start = None
+        self._origin = time.perf_counter_ns() # trace timestamps are counted from here
+        self._pid = os.getpid()
+
+    def enable(self, tracing = False):
+        """starts measuring, with tracing every phase is also kept as a trace event"""
+        self.enabled = True
+        self.tracing = self.tracing or tracing
+
+    def disable(self):
+        self.enabled = False
+        self._frame_start = None
+
+    def phase(self, name):
+        """returns a context manager that times the code inside it as the phase name"""
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    def count(self, name, amount = 1):
+        """adds amount to the counter name of the current frame"""
+        if self.enabled:
+            self._counters[name] += amount
+            self._totals[name] += amount
+
+    def _add(self, name, start, end):
+        self._phases[name] += end - start
+        if self.tracing and len(self.events) < self.max_events:
+            self.events.append({"name": name, "cat": "phase", "ph": "X", "ts": (start - self._origin) / 1000,
+                                "dur": (end - start) / 1000, "pid": self._pid, "tid": threading.get_ident()})
+
+    def end_frame(self):
+        """closes the current frame, its times go to the history (and its counters to the trace)"""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self._frame_start is not None:
+            self.history.append((dict(self._phases), dict(self._counters), now - self._frame_start))
+            if self.tracing and self._counters and len(self.events) < self.max_events:
+                self.events.append({"name": "counters", "ph": "C", "ts": (now - self._origin) / 1000,
+                                    "pid": self._pid, "args": dict(self._counters)})
+        self._frame_start = now
+        self._phases = Counter()
+        self._counters = Counter()
+
+    def summary(self):
+        """returns (frames, average frame ms, phase -> (average ms, most ms), counter -> (average per frame, total))
+        over the frames in the history"""
+        frames = len(self.history)
+        if not frames:
+            return 0, 0.0, {}, {}
+        phases = {}
+        counters = Counter()
+        for frame_phases, frame_counters, _ in self.history:
+            for name, spent in frame_phases.items():
+                total, most = phases.get(name, (0, 0))
+                phases[name] = (total + spent, max(most, spent))
+            counters.update(frame_counters)
+        average_frame = sum(spent for _, _, spent in self.history) / frames / 1e6
+        return (frames, average_frame, {name: (total / frames / 1e6, most / 1e6) for name, (total, most) in phases.items()},
+                {name: (counters[name] / frames, self._totals[name]) for name in self._totals})
+
+    def export(self, path):
+        """writes the recorded events to path as a Chrome trace"""
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+        return len(self.events)
+
+
+profiler = Profiler() # the profiler of the game, disabled until it is asked for
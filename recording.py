@@ -0,0 +1,194 @@
+"""Summary: This file records the input of a game and plays it back without a window.
+The game reads its input once per frame through an input object: LiveInput takes the events, the mouse position and
+the modifier keys from pygame (and, when recording, writes them to a session file with the time of the frame), and
+ReplayInput gives back the frames of a session file instead. A session starts with the state of the board when it was
+recorded and ends with the state it was left in, so replaying it checks that the same input still leads to the same
+board, and times every frame of the replay, which runs with the dummy video driver as fast as it can.
+
+session lines: {"version": 1, "fps": fps, "state": snapshot of the board} the first line
+               [ms since the start, mouse x, mouse y, modifier keys, [[event type, {event attributes}], ...]] a frame
+               ["end", snapshot of the board] the last line, written when the game is closed
+
+usage: python recording.py SESSION [--json report.json]"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import pygame
+from journal import parse_snapshot, state_of, restore
+from profiler import profiler
+
+
+VERSION = 1
+
+
+def _plain(value):
+    # json friendly copy of an event attribute, None if it can't be written
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (tuple, list)):
+        return [_plain(item) for item in value]
+    return None
+
+
+def _event_to_json(event):
+    return [event.type, {key: _plain(value) for key, value in event.dict.items() if _plain(value) is not None}]
+
+
+def _event_from_json(item):
+    kind, attributes = item
+    return pygame.event.Event(kind, {key: tuple(value) if isinstance(value, list) else value
+                                     for key, value in attributes.items()})
+
+
+class LiveInput:
+    """Class that reads the input of each frame from pygame, writing it to a session file if path is given"""
+    def __init__(self, path = None):
+        self.path = path
+        self.mouse = (0, 0) # position of the mouse when the frame's events were read
+        self.mods = 0 # modifier keys held when the frame's events were read
+        self._file = None
+        self._start = None
+
+    def start(self, game):
+        """called by the game once its engine is ready, a recording begins with the state of the board"""
+        if self.path is not None:
+            self._file = open(self.path, "w")
+            self._file.write(json.dumps({"version": VERSION, "fps": game.fps,
+                                         "state": state_of(game.engine).snapshot()}) + "\n")
+            self._start = time.perf_counter()
+
+    def read(self, wait = False):
+        """returns the events of a frame, if wait is True and nothing happened yet it sleeps until the next event arrives"""
+        events = pygame.event.get()
+        if wait and not events:
+            with profiler.phase("wait"):
+                events = [pygame.event.wait()] + pygame.event.get()
+        self.mouse = pygame.mouse.get_pos()
+        self.mods = pygame.key.get_mods()
+        if self._file is not None:
+            self._file.write(json.dumps([round((time.perf_counter() - self._start)*1000, 3), *self.mouse, self.mods,
+                                         [_event_to_json(event) for event in events]]) + "\n")
+        return events
+
+    def stop(self, game):
+        """ends the recording with the state the board was left in"""
+        if self._file is not None:
+            self._file.write(json.dumps(["end", state_of(game.engine).snapshot()]) + "\n")
+            self._file.close()
+            self._file = None
+
+
+class ReplayInput:
+    """Class that gives back the frames of a session file as the input of the game"""
+    def __init__(self, path):
+        self.frames = [] # (ms, mouse, mods, events)
+        self.end = None # snapshot of the board at the end of the recording, None if the game wasn't closed properly
+        with open(path, "r") as file:
+            header = json.loads(file.readline())
+            if header.get("version") != VERSION:
+                raise ValueError(f"{path} is a version {header.get('version')} session, only version {VERSION} can be replayed")
+            self.state = header["state"]
+            self.fps = header["fps"]
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError: # a game that was killed leaves half a line
+                    break
+                if entry[0] == "end":
+                    self.end = entry[1]
+                else:
+                    self.frames.append((entry[0], (entry[1], entry[2]), entry[3], entry[4]))
+        self.mouse = (0, 0)
+        self.mods = 0
+        self.next = 0 # index of the next frame to give
+
+    def finished(self):
+        return self.next >= len(self.frames)
+
+    def start(self, game):
+        """puts the board back in the state it was in when the session was recorded"""
+        restore(game.engine, parse_snapshot(self.state))
+
+    def read(self, wait = False):
+        if self.finished():
+            return []
+        _, self.mouse, self.mods, events = self.frames[self.next]
+        self.next += 1
+        return [_event_from_json(item) for item in events]
+
+    def stop(self, game):
+        pass
+
+
+def replay(path):
+    """plays the session at path back in a new game as fast as possible.
+    Returns (list of the seconds each frame took, snapshot of the final board, snapshot recorded at the end or None)"""
+    from game import Game # imported here so the video driver can be chosen first
+    player = ReplayInput(path)
+    game = Game(player.fps, source = player) # the "moving on" screen lasts as many frames as it did, it just isn't paced
+    times = []
+    try:
+        while not player.finished(): # the same steps as Game.run_game, without waiting for events or the clock
+            start = time.perf_counter()
+            game._check_events()
+            game._update_screen()
+            times.append(time.perf_counter() - start)
+    except SystemExit: # the player quit the game in the recording
+        times.append(time.perf_counter() - start)
+    return times, state_of(game.engine).snapshot(), player.end
+
+
+def describe(snapshot):
+    """returns a line describing a board snapshot"""
+    _, level, answers_shown, colors, letters = snapshot
+    return (f"level {level + 1}{' (answers shown)' if answers_shown else ''}, "
+            f"{sum(1 for *_, color in colors if color != 'Default')} colored cells, "
+            f"{sum(1 for *_, letter in letters if letter.strip())} letters")
+
+
+def _same(snapshot, other):
+    # snapshots list the cells in the order they were changed, which doesn't matter
+    return snapshot[:3] == other[:3] and all(sorted(map(tuple, snapshot[index])) == sorted(map(tuple, other[index]))
+                                             for index in (3, 4))
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Replay a recorded session without a window and time its frames")
+    parser.add_argument("session", help = "file written by python game.py --record SESSION")
+    parser.add_argument("--json", metavar = "FILE", help = "also write the report to FILE")
+    args = parser.parse_args()
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    session = os.path.abspath(args.session)
+    os.chdir(os.path.dirname(os.path.abspath(__file__))) # the game loads its images and levels from here
+
+    times, final, expected = replay(session)
+    milliseconds = sorted(spent*1000 for spent in times)
+    report = {"frames": len(times), "total_ms": sum(milliseconds),
+              "median_ms": statistics.median(milliseconds) if times else 0.0,
+              "p95_ms": milliseconds[int(len(milliseconds)*0.95)] if times else 0.0,
+              "max_ms": milliseconds[-1] if times else 0.0,
+              "final": final, "matches": None if expected is None else _same(final, expected)}
+    print(f"{report['frames']} frames in {report['total_ms']:.1f}ms: median {report['median_ms']:.3f}ms, "
+          f"95% {report['p95_ms']:.3f}ms, max {report['max_ms']:.3f}ms")
+    print(f"final board: {describe(final)}")
+    if expected is None:
+        print("the session has no end state to compare with")
+    elif report["matches"]:
+        print("the final board matches the recording")
+    else:
+        print(f"the final board doesn't match the recording: {describe(expected)}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent = 4)
+    if report["matches"] is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
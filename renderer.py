@@ -0,0 +1,244 @@
+"""Summary: This file contains the class LevelRenderer which draws the screen of a level in retained mode.
+Every cell, button and label on the level screen is a dirty sprite that remembers what it last showed,
+so each frame only the rectangles whose color, letter or hover state changed are redrawn and sent to the display
+with pygame.display.update instead of filling and flipping the whole window.
+Only the cells the game's viewport shows have sprites, so a big grid costs no more per frame than the cells on screen."""
+
+import time
+
+import pygame
+from assets import texts
+from profiler import profiler
+from viewport import ZOOMS
+
+
+def letter_size(font, scale):
+    """returns the size of the letters of the cells drawn at scale, font is the (font file, size) at the biggest zoom"""
+    return max(8, int(font[1]*scale / ZOOMS[-1]))
+
+
+class CellSprite(pygame.sprite.DirtySprite):
+    """Sprite for one cell of the grid, its image is the cell's button with its letter written over it.
+    Only the part of the cell inside the area of the grid is drawn"""
+    def __init__(self, character, font, area):
+        super().__init__()
+        self.character = character
+        self.font = font # (font file, size) of the letter on a cell at the biggest zoom
+        self.hovered = False
+        self._state = None # (button image, letter, hovered) that the current image was made from
+        self.update()
+        self.place(area)
+
+    def place(self, area):
+        """moves the sprite to where its button is now, cut to area. It isn't marked dirty, cells only move
+        when the whole grid does and then it is redrawn at once"""
+        rect = self.character.get_button().rect
+        self.rect = rect.clip(area)
+        self.source_rect = self.rect.move(-rect.x, -rect.y)
+
+    def update(self):
+        """rebuilds the image only if the cell changed since it was last drawn"""
+        button = self.character.get_button()
+        state = (button.image, self.character.get_letter(), self.hovered)
+        if state == self._state:
+            return
+        self._state = state
+        profiler.count("cell images")
+        self.image = button.image.copy()
+        if self.hovered and (self.character.get_color_change() or self.character.get_has_text()):
+            self.image.fill((30, 30, 30), special_flags=pygame.BLEND_RGB_ADD) # cells that can be edited light up under the mouse
+        ratio = button.scale / ZOOMS[-1] # the letter shrinks with the cell
+        letter = texts.render(self.font[0], letter_size(self.font, button.scale), self.character.get_letter())
+        self.image.blit(letter, (int(35*ratio), int(32*ratio)))
+        self.dirty = 1
+
+
+class ButtonSprite(pygame.sprite.DirtySprite):
+    """Sprite that shows a Button object and follows it when the button's image is swapped"""
+    def __init__(self, button):
+        super().__init__()
+        self.button = button
+        self.image = None
+        self.update()
+
+    def update(self):
+        if self.image is not self.button.image:
+            self.image = self.button.image
+            self.rect = self.button.rect
+            self.dirty = 1
+
+
+class TextSprite(pygame.sprite.DirtySprite):
+    """Sprite for a line of text that is only rendered again when the text changes"""
+    def __init__(self, font, position, color = (0, 0, 0)):
+        super().__init__()
+        self.font = font # (font file, size)
+        self.position = position
+        self.color = color
+        self.text = None
+        self.set_text("")
+
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.image = texts.render(*self.font, text, self.color)
+            self.rect = self.image.get_rect(topleft = self.position)
+            self.dirty = 1
+
+
+class HudSprite(pygame.sprite.DirtySprite):
+    """Sprite with the profiler's summary, drawn over the level while the HUD is shown"""
+    def __init__(self, position, size = 18, every = 0.25):
+        super().__init__()
+        self.position = position
+        self.font = texts.font(None, size) # the numbers change all the time, so the lines aren't kept in the text cache
+        self.every = every # seconds between two updates of the text
+        self.updated = 0
+        self.visible = 0
+        self.image = pygame.Surface((1, 1))
+        self.rect = self.image.get_rect(topleft = position)
+
+    def set_lines(self, lines, force = False):
+        """draws the lines of text, at most once every self.every seconds unless force is True"""
+        now = time.perf_counter()
+        if not force and now - self.updated < self.every:
+            return
+        self.updated = now
+        surfaces = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max((surface.get_width() for surface in surfaces), default = 1) + 10
+        height = sum(surface.get_height() for surface in surfaces) + 10
+        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.image.fill((0, 0, 0, 180))
+        y = 5
+        for surface in surfaces:
+            self.image.blit(surface, (5, y))
+            y += surface.get_height()
+        self.rect = self.image.get_rect(topleft = self.position)
+        self.dirty = 1
+
+
+def hud_lines():
+    """returns the lines of text of the profiler HUD"""
+    frames, frame_ms, phases, counters = profiler.summary()
+    lines = [f"profiler (p to hide)  {frames} frames, {frame_ms:.2f}ms per frame"]
+    for name, (average, most) in sorted(phases.items(), key = lambda item: -item[1][0]):
+        lines.append(f"{name:<18} {average:7.3f}ms  max {most:7.3f}ms")
+    for name, (average, total) in sorted(counters.items()):
+        lines.append(f"{name:<18} {average:7.2f} per frame  {total} in all")
+    return lines
+
+
+class LevelRenderer:
+    """Draws the level screen of a game: category, color buttons, grid cells and the control buttons.
+    The grid it shows is rebuilt whenever the game's self.characters points to a different board"""
+    def __init__(self, game):
+        self.game = game
+        self.screen = game.screen
+        self.background = pygame.Surface(self.screen.get_size())
+        self.background.fill(game.bg_color)
+
+        self.group = pygame.sprite.LayeredDirty()
+        self.group.clear(self.screen, self.background)
+        self.group.set_timing_threshold(1000) # never fall back to redrawing the full screen because a frame was slow
+
+        category_font = ("slkscr.ttf", 40)
+        self.category_label = TextSprite(category_font, (200, 600))
+        self.category_label.set_text("Category:")
+        self.category_text = TextSprite(category_font, (200, 650))
+        self.button_sprites = {}
+        for button in game.color_buttons + [game.check_button, game.pause_button, game.show_answers_button]:
+            self.button_sprites[button] = ButtonSprite(button)
+        self.group.add(self.category_label, self.category_text, *self.button_sprites.values())
+        self.hud = HudSprite((5, 5))
+        self.group.add(self.hud, layer = 1) # over everything else
+
+        self.cells = [] # sprites of the cells that are shown
+        self._sprites = {} # (i, j) -> sprite of every cell shown since the grid was built
+        self._characters = None # board that the cell sprites were made for
+        self._layout = None # (viewport, version) the shown cells were placed for
+        self._full_redraw = True
+
+    def invalidate(self):
+        """the next draw repaints and pushes the whole window, used after another screen was drawn over the level"""
+        self._full_redraw = True
+
+    def set_visible(self, button, visible):
+        """shows or hides one of the control buttons"""
+        sprite = self.button_sprites[button]
+        if sprite.visible != visible:
+            sprite.visible = visible
+
+    def show_hud(self, visible):
+        """shows or hides the profiler HUD"""
+        if self.hud.visible != visible:
+            self.hud.visible = visible
+            if visible:
+                self.hud.set_lines(hud_lines(), force = True)
+
+    def draw_hud(self):
+        """draws the HUD straight on the screen, for the menus that are drawn without the renderer"""
+        if self.hud.visible:
+            self.hud.set_lines(hud_lines())
+            self.screen.blit(self.hud.image, self.hud.rect)
+
+    def _build_cells(self, characters):
+        """forgets the sprites of the previous grid"""
+        self.group.remove(*self.cells)
+        self.cells = []
+        self._sprites = {}
+        self._characters = characters
+        self._layout = None
+
+    def _show_cells(self):
+        """shows the sprites of the cells in the game's viewport, making the ones that don't exist yet"""
+        viewport = self.game.viewport
+        visible = viewport.visible_cells()
+        shown = []
+        for i, j in visible:
+            sprite = self._sprites.get((i, j))
+            if sprite is None:
+                sprite = self._sprites[i, j] = CellSprite(self._characters[i][j], self.game.cell_font, viewport.area)
+            else:
+                sprite.place(viewport.area)
+            sprite.dirty = 0 # drawn by the full redraw, not one by one
+            shown.append(sprite)
+        kept = set(shown)
+        self.group.remove(*[sprite for sprite in self.cells if sprite not in kept]) # only the cells that scrolled in or out
+        self.group.add(*kept.difference(self.cells))
+        self.cells = shown
+        self._layout = (viewport, viewport.version)
+        self._full_redraw = True # the cells moved, what was under them has to be drawn again
+
+    def draw(self):
+        """brings every sprite up to date and updates the parts of the window that changed.
+        Returns the list of rectangles that were updated"""
+        if self.game.characters is not self._characters:
+            self._build_cells(self.game.characters)
+        if self._layout != (self.game.viewport, self.game.viewport.version):
+            self._show_cells()
+        self.category_text.set_text(self.game.engine.board.GetCategory())
+
+        with profiler.phase("sprites"):
+            hovered = self._sprites.get(self.game.cell_map.find(self.game.source.mouse))
+            for cell in self.cells:
+                cell.hovered = cell is hovered
+                cell.update()
+            for sprite in self.button_sprites.values():
+                sprite.update()
+            if self.hud.visible:
+                self.hud.set_lines(hud_lines())
+
+        full_redraw = self._full_redraw
+        with profiler.phase("blit"):
+            if full_redraw:
+                self._full_redraw = False
+                self.group.repaint_rect(self.screen.get_rect())
+            rects = self.group.draw(self.screen)
+            if full_redraw:
+                for sprite in self.group: # every sprite was just drawn, nothing is left dirty for the next frame
+                    if sprite.dirty == 1:
+                        sprite.dirty = 0
+        if rects:
+            with profiler.phase("display"):
+                pygame.display.update(rects)
+        return rects
@@ -0,0 +1,255 @@
+"""Summary: This file serves Word-Flow puzzles to many players at once over a local connection, and load tests the server.
+The levels and answers are loaded once and shared, read only, by every player, and so are the untouched boards of the
+levels: each connection only has its own Engine board, a copy of the shared one. Requests and responses are json objects, one per line:
+    {"op": "levels"}                          -> {"count": number of levels, "categories": [...]}
+    {"op": "level", "level": N}               -> starts level N (counted from 0), returns its category and grid
+    {"op": "daily"}                           -> starts the level of the day
+    {"op": "color", "i": I, "j": J, "color": C}    -> changes the color of a cell (to "Default" or the color of a path),
+                                                      returns {"changed": bool}
+    {"op": "letter", "i": I, "j": J, "letter": L}  -> changes the letter of a cell, returns {"changed": bool}
+    {"op": "check"}                           -> checks the board, returns {"solved": bool, "reset": [[i, j], ...]}
+    {"op": "board"}                           -> returns the letters and colors of the board
+Every response has "ok" (and "error" when it is false) and the "id" of its request if it had one. Checking a board is
+the slow part, so it runs on a pool of processes that each load the levels once when they start.
+
+usage: python server.py serve [--host 127.0.0.1] [--port 8765] [--workers N] [--levels levels.wfp]
+       python server.py load [--host 127.0.0.1] [--port 8765] [--clients 50] [--rounds 20]"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from board import DEFAULT_COLOR
+from engine import Engine, open_levels
+from journal import parse_snapshot, restore, state_of
+from levelpack import LevelPack
+from levels import read_levels, read_answers
+
+
+# the levels of a checking process, loaded once by _start_worker
+_worker_engine = None
+
+
+def load_levels(path = None):
+    """returns the (levels, answers) served, from a pack or json files (the game's own levels by default)"""
+    if path is None:
+        return open_levels()
+    if path.endswith(".json"):
+        return read_levels(path), read_answers(os.path.join(os.path.dirname(path), "answers.json"))
+    pack = LevelPack(path)
+    return pack.levels, pack.answers
+
+
+def _start_worker(path):
+    # runs once in every checking process
+    global _worker_engine
+    _worker_engine = Engine(*load_levels(path))
+
+
+def _check(snapshot):
+    # runs in a checking process, returns (solved, reset) for a board snapshot (see journal.py)
+    restore(_worker_engine, parse_snapshot(snapshot))
+    solved, reset = _worker_engine.check()
+    return solved, reset
+
+
+class PuzzleServer:
+    """Class with the shared levels and the pool that checks boards, it answers the requests of every connection"""
+    def __init__(self, path = None, workers = None):
+        self.path = path
+        self.levels, self.answers = load_levels(path)
+        self.categories = [level.category for level in self.levels]
+        self.engine = Engine(self.levels, self.answers) # never played on, it makes the boards the players' engines copy
+        self.pool = None
+        if workers != 0:
+            self.pool = ProcessPoolExecutor(workers, initializer = _start_worker, initargs = (path,))
+        else: # checks run in the server process, between requests
+            _start_worker(path)
+        self.connections = 0
+        self.requests = 0
+        self.level_json = lru_cache(maxsize = None)(self._level_json) # every player gets the same description
+
+    def _level_json(self, index):
+        """returns the description of a level sent to the players, made once per level"""
+        level = self.levels[index]
+        return {"level": index, "category": level.category,
+                "cells": [[[cell.letter, cell.color, cell.has_text, cell.color_change] for cell in row] for row in level.cells]}
+
+    def daily_level(self, day = None):
+        """returns the index of the level of a day (today by default)"""
+        day = day or datetime.date.today()
+        return day.toordinal() % len(self.levels)
+
+    async def handle(self, reader, writer):
+        """serves one connection until it is closed"""
+        self.connections += 1
+        engine = Engine(self.levels, self.answers, shared = self.engine) # only the board is the player's own
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    response = await self.answer(engine, request)
+                except Exception as error: # a bad request is answered, it doesn't close the connection
+                    response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+                if isinstance(request, dict) and "id" in request:
+                    response["id"] = request["id"]
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def answer(self, engine, request):
+        """returns the response to one request of the player playing on engine"""
+        self.requests += 1
+        op = request.get("op")
+        if op == "levels":
+            return {"ok": True, "count": len(self.levels), "categories": self.categories}
+        if op in ("level", "daily"):
+            index = self.daily_level() if op == "daily" else int(request["level"])
+            if not 0 <= index < len(self.levels):
+                return {"ok": False, "error": f"there are {len(self.levels)} levels"}
+            engine.load_level(index)
+            return {"ok": True, **self.level_json(index)}
+        if op in ("color", "letter"):
+            i, j = int(request["i"]), int(request["j"])
+            grid = engine.board.GetBoard()
+            if not (0 <= i < len(grid) and 0 <= j < len(grid[i])): # a negative index would change a cell from the end
+                return {"ok": False, "error": f"the board has {len(grid)} rows and {len(grid[0]) if grid else 0} columns"}
+            if op == "color":
+                color = str(request["color"])
+                # any other color would fill cells without being part of a path, and be kept by the board for good
+                if color != DEFAULT_COLOR and color not in engine.paths.ends:
+                    return {"ok": False, "error": f"the colors of this level are {sorted(engine.paths.ends)} and {DEFAULT_COLOR}"}
+                return {"ok": True, "changed": engine.set_color(i, j, color)}
+            return {"ok": True, "changed": engine.set_letter(i, j, str(request["letter"])[:1])}
+        if op == "check":
+            if self.pool is None:
+                solved, reset = _check(state_of(engine).snapshot())
+            else:
+                solved, reset = await asyncio.get_running_loop().run_in_executor(self.pool, _check, state_of(engine).snapshot())
+            engine.reset(reset) # the server's copy of the board is reset the way the worker's was
+            return {"ok": True, "solved": solved, "reset": reset}
+        if op == "board":
+            grid = engine.board.GetBoard()
+            return {"ok": True, "level": engine.current_level,
+                    "cells": [[[character.get_letter(), character.GetColor()] for character in row] for row in grid]}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+async def serve(host, port, path = None, workers = None):
+    server = PuzzleServer(path, workers)
+    listener = await asyncio.start_server(server.handle, host, port, limit = 1 << 20)
+    print(f"serving {len(server.levels)} levels on {host}:{port}", flush = True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+class Client:
+    """Class with one connection to the server, request sends a request and waits for its response"""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.latencies = {} # op -> list of seconds
+
+    @classmethod
+    async def connect(cls, host, port):
+        return cls(*await asyncio.open_connection(host, port, limit = 1 << 20))
+
+    async def request(self, op, **fields):
+        start = time.perf_counter()
+        self.writer.write(json.dumps({"op": op, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        self.latencies.setdefault(op, []).append(time.perf_counter() - start)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def _play(client, rounds, rng):
+    # one player: picks levels, colors and letters a few cells and checks, rounds times
+    count = (await client.request("levels"))["count"]
+    for _ in range(rounds):
+        level = await client.request("level", level = rng.randrange(count))
+        cells = [(i, j) for i, row in enumerate(level["cells"]) for j, cell in enumerate(row) if cell[3]]
+        colors = sorted({cell[1] for row in level["cells"] for cell in row if not cell[3]} | {"Default"})
+        for i, j in rng.sample(cells, min(len(cells), 5)):
+            await client.request("color", i = i, j = j, color = rng.choice(colors))
+            await client.request("letter", i = i, j = j, letter = rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        await client.request("check")
+
+
+async def load_test(host, port, clients, rounds, seed = 1):
+    """runs clients players at once against a running server, returns (requests, seconds, op -> latencies)"""
+    connections = [await Client.connect(host, port) for _ in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(_play(client, rounds, random.Random(seed + number)) for number, client in enumerate(connections)))
+    elapsed = time.perf_counter() - start
+    latencies = {}
+    for client in connections:
+        for op, times in client.latencies.items():
+            latencies.setdefault(op, []).extend(times)
+        await client.close()
+    return sum(len(times) for times in latencies.values()), elapsed, latencies
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered)*fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Serve Word-Flow puzzles over a local connection, or load test the server")
+    commands = parser.add_subparsers(dest = "command", required = True)
+    serving = commands.add_parser("serve", help = "run the server")
+    loading = commands.add_parser("load", help = "run many players against a running server")
+    for command in (serving, loading):
+        command.add_argument("--host", default = "127.0.0.1")
+        command.add_argument("--port", type = int, default = 8765)
+    serving.add_argument("--workers", type = int, help = "processes that check boards (0 checks in the server itself)")
+    serving.add_argument("--levels", help = "level pack or grid.json to serve, the game's levels by default")
+    loading.add_argument("--clients", type = int, default = 50, help = "players connected at once")
+    loading.add_argument("--rounds", type = int, default = 20, help = "levels each player plays")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.levels, args.workers))
+        except KeyboardInterrupt:
+            pass
+        return
+    requests, elapsed, latencies = asyncio.run(load_test(args.host, args.port, args.clients, args.rounds))
+    every = [latency for times in latencies.values() for latency in times]
+    print(f"{requests} requests from {args.clients} clients in {elapsed:.2f}s: {requests/elapsed:.0f} requests/s, "
+          f"p50 {statistics.median(every)*1000:.2f}ms, p99 {percentile(every, 0.99)*1000:.2f}ms")
+    for op, times in sorted(latencies.items()):
+        print(f"  {op:8} {len(times):7} requests  p50 {statistics.median(times)*1000:7.2f}ms  p99 {percentile(times, 0.99)*1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
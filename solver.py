@@ -0,0 +1,275 @@
+"""Summary: This file contains a solver for the color paths of a level.
+Given a Board whose path ends are fixed (cells that can't change color), it finds the ways to connect every pair of ends
+of the same color with a path of 4-adjacent cells, where paths never cross and (by default) cover the whole grid.
+The search keeps the filled cells and the cells of each color as bitmasks and prunes with dead cell and region checks,
+so a 10x10 grid is usually solved in a few milliseconds. Looking for two solutions tells if a level's solution is unique.
+
+usage: python solver.py [levels.wfp | grid.json] [--level N] [--touching] [--no-fill]"""
+
+import argparse
+import sys
+import time
+
+from engine import DEFAULT_COLOR
+
+
+class Solution:
+    """Class with one solution of a level: the cells of each color's path, in order from the start of the word to its end"""
+    def __init__(self, paths, rows, columns):
+        self.paths = paths # color -> list of (row, column)
+        self.rows = rows
+        self.columns = columns
+
+    def colors(self):
+        """returns the colors of the solved grid as a tuple of rows, cells outside every path are "Default" """
+        grid = [[DEFAULT_COLOR] * self.columns for _ in range(self.rows)]
+        for color, path in self.paths.items():
+            for i, j in path:
+                grid[i][j] = color
+        return tuple(tuple(row) for row in grid)
+
+
+def find_endpoints(board):
+    """returns a dictionary color -> [start, end] with the (row, column) of the two ends of each path.
+    The ends are the colored cells that can't change color, the start is the end with a given letter if there is one"""
+    grid = board.GetBoard()
+    ends = {}
+    for i in range(len(grid)):
+        for j in range(len(grid[i])):
+            character = grid[i][j]
+            if not character.get_color_change() and character.GetColor() != DEFAULT_COLOR:
+                ends.setdefault(character.GetColor(), []).append((i, j))
+    for color, cells in ends.items():
+        if len(cells) != 2:
+            raise ValueError(f"{color} has {len(cells)} ends instead of 2")
+        if grid[cells[1][0]][cells[1][1]].get_has_text() is False and grid[cells[0][0]][cells[0][1]].get_has_text():
+            cells.reverse() # the given letter starts the word
+    return ends
+
+
+def solve(board, limit = 2, fill = True, touching = False):
+    """Returns up to limit solutions of the board's color paths (as Solution objects), limit None finds them all.
+    fill: every cell of the grid must be part of a path
+    touching: a path may run next to itself, by default a cell of a path only touches the cells before and after it"""
+    return _Search(board, limit, fill, touching).run()
+
+
+def is_unique(board, fill = True, touching = False):
+    """returns True if the board's color paths have exactly one solution"""
+    return len(solve(board, 2, fill, touching)) == 1
+
+
+class _Search:
+    """depth first search over the moves of the path ends, see solve"""
+    def __init__(self, board, limit, fill, touching):
+        grid = board.GetBoard()
+        self.rows = rows = len(grid)
+        self.columns = columns = len(grid[0]) if rows else 0
+        self.limit = limit
+        self.fill = fill
+        self.touching = touching
+        size = rows * columns
+        self.full = (1 << size) - 1
+
+        # neighbors of every cell as lists and as masks, cells are numbered row by row
+        self.neighbors = []
+        self.neighbor_masks = []
+        for cell in range(size):
+            i, j = divmod(cell, columns)
+            around = [i2*columns + j2 for i2, j2 in ((i-1, j), (i+1, j), (i, j-1), (i, j+1)) if 0 <= i2 < rows and 0 <= j2 < columns]
+            self.neighbors.append(around)
+            self.neighbor_masks.append(sum(1 << n for n in around))
+        # masks used to spread a set of cells to its neighbors with shifts
+        left_column = sum(1 << (i*columns) for i in range(rows))
+        self.not_left = self.full & ~left_column
+        self.not_right = self.full & ~(left_column << (columns - 1))
+
+        ends = find_endpoints(board)
+        self.colors = list(ends)
+        self.filled = 0
+        self.cells = [] # mask of the cells of each color
+        self.heads = [] # [start side end, end side end] that the paths grow from
+        self.trails = [] # cells added from each side, in order
+        self.done = [False] * len(self.colors)
+        for color in self.colors:
+            start, end = (i*columns + j for i, j in ends[color])
+            self.filled |= (1 << start) | (1 << end)
+            self.cells.append((1 << start) | (1 << end))
+            self.heads.append([start, end])
+            self.trails.append(([start], [end]))
+        self.solutions = []
+        self.seen = set() # color layouts already found, paths that touch themselves can give the same layout twice
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 2*size + 100)) # one level of recursion per move
+
+    def run(self):
+        if self.colors and self._feasible(range(self.rows*self.columns)):
+            self._search()
+        return self.solutions
+
+    def _finished(self):
+        return self.limit is not None and len(self.solutions) >= self.limit
+
+    def _options(self, color, side):
+        """returns the cells the path of color can grow to from the given side, -1 means joining the other side"""
+        head = self.heads[color][side]
+        other = self.heads[color][1 - side]
+        if other in self.neighbors[head]:
+            if not self.touching:
+                return [-1] # growing anywhere else would make the path touch itself
+            options = [-1]
+        else:
+            options = []
+        empty = self.full & ~self.filled
+        allowed = self.cells[color] & ~((1 << head) | (1 << other))
+        for cell in self.neighbors[head]:
+            if empty >> cell & 1 and (self.touching or not self.neighbor_masks[cell] & allowed):
+                options.append(cell)
+        return options
+
+    def _search(self):
+        # pick the path end with the fewest moves, a single path end is enough to split the solutions without repeats
+        best = None
+        for color in range(len(self.colors)):
+            if self.done[color]:
+                continue
+            for side in (0, 1):
+                options = self._options(color, side)
+                if best is None or len(options) < len(best[2]):
+                    best = (color, side, options)
+                    if len(options) <= 1:
+                        break
+            if best is not None and len(best[2]) <= 1:
+                break
+        if best is None: # every path is complete
+            if not self.fill or self.filled == self.full:
+                self._record()
+            return
+        color, side, options = best
+        head = self.heads[color][side]
+        for cell in options:
+            if cell == -1:
+                self.done[color] = True
+                if self._feasible(self.neighbors[head] + self.neighbors[self.heads[color][1 - side]]):
+                    self._search()
+                self.done[color] = False
+            else:
+                bit = 1 << cell
+                self.filled |= bit
+                self.cells[color] |= bit
+                self.heads[color][side] = cell
+                self.trails[color][side].append(cell)
+                if self._feasible(self.neighbors[head] + self.neighbors[cell]):
+                    self._search()
+                self.trails[color][side].pop()
+                self.heads[color][side] = head
+                self.cells[color] &= ~bit
+                self.filled &= ~bit
+            if self._finished():
+                return
+
+    def _feasible(self, changed):
+        """checks that the grid can still be completed after a move, changed are the cells next to the move"""
+        empty = self.full & ~self.filled
+        live = 0 # path ends that can still grow
+        for color in range(len(self.colors)):
+            if not self.done[color]:
+                live |= (1 << self.heads[color][0]) | (1 << self.heads[color][1])
+        if self.fill:
+            # an empty cell needs two ways in and out, from empty cells or path ends
+            open_cells = empty | live
+            for cell in changed:
+                if empty >> cell & 1 and (self.neighbor_masks[cell] & open_cells).bit_count() < 2:
+                    return False
+
+        # every unfinished path needs both ends on the same region of empty cells (or next to each other),
+        # and when the grid has to be filled every region needs a path that can run through it
+        regions = self._regions(empty)
+        for color in range(len(self.colors)):
+            if self.done[color]:
+                continue
+            start, end = self.heads[color]
+            if end in self.neighbors[start]:
+                continue
+            start_mask = self.neighbor_masks[start]
+            end_mask = self.neighbor_masks[end]
+            if not any(region & start_mask and region & end_mask for region in regions):
+                return False
+        if self.fill:
+            for region in regions:
+                usable = False
+                for color in range(len(self.colors)):
+                    if not self.done[color]:
+                        start, end = self.heads[color]
+                        if region & self.neighbor_masks[start] and region & self.neighbor_masks[end]:
+                            usable = True
+                            break
+                if not usable:
+                    return False
+        return True
+
+    def _regions(self, empty):
+        """splits the empty cells into 4-connected regions, returned as masks"""
+        regions = []
+        columns = self.columns
+        while empty:
+            region = empty & -empty
+            while True:
+                grown = (region | ((region << 1) & self.not_left) | ((region >> 1) & self.not_right)
+                         | (region << columns) | (region >> columns)) & empty
+                if grown == region:
+                    break
+                region = grown
+            regions.append(region)
+            empty &= ~region
+        return regions
+
+    def _record(self):
+        layout = tuple(self.cells)
+        if layout in self.seen:
+            return
+        self.seen.add(layout)
+        paths = {}
+        for color in range(len(self.colors)):
+            start_side, end_side = self.trails[color]
+            order = start_side + end_side[::-1]
+            paths[self.colors[color]] = [divmod(cell, self.columns) for cell in order]
+        self.solutions.append(Solution(paths, self.rows, self.columns))
+
+
+def main():
+    from engine import open_levels
+    from levels import board_of, read_levels
+    from levelpack import LevelPack
+
+    parser = argparse.ArgumentParser(description = "Solve the color paths of Word-Flow levels")
+    parser.add_argument("levels", nargs = "?", default = None, help = "level pack or json file, the game's levels by default")
+    parser.add_argument("--level", type = int, help = "only solve this level (counting from 1)")
+    parser.add_argument("--touching", action = "store_true", help = "allow paths that run next to themselves")
+    parser.add_argument("--no-fill", action = "store_true", help = "don't require every cell to be part of a path")
+    args = parser.parse_args()
+
+    answers = None
+    if args.levels is None:
+        levels, answers = open_levels()
+    elif args.levels.endswith(".json"):
+        levels = read_levels(args.levels)
+    else:
+        pack = LevelPack(args.levels)
+        levels, answers = pack.levels, pack.answers
+    indexes = range(len(levels)) if args.level is None else [args.level - 1]
+
+    for index in indexes:
+        board = board_of(levels[index])
+        start = time.perf_counter()
+        solutions = solve(board, 2, not args.no_fill, args.touching)
+        elapsed = (time.perf_counter() - start) * 1000
+        status = {0: "no solution", 1: "unique"}.get(len(solutions), "not unique")
+        if len(solutions) == 1 and answers is not None:
+            expected = tuple(tuple(color for _, color in row) for row in answers[index])
+            if not any(solution.colors() == expected for solution in solutions):
+                status += ", differs from the answer"
+        print(f"level {index+1} ({levels[index].category}): {status}  {elapsed:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
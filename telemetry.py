@@ -0,0 +1,140 @@
+"""Summary: This file contains the class Telemetry which records what happens while a level is played, to tune how hard
+the levels are, and the command that sums the recordings up.
+The game records an event when a level starts, when the check button is pressed (with the number of wrong cells it
+cleared), when a level is solved (with the seconds it was played) and when the answers are shown. Recording an event only
+appends it to a ring buffer in memory, a background thread writes what was buffered to a SQLite file in one
+transaction every second, so the frame loop never waits for the disk. If the writer falls behind the oldest events are
+dropped instead of slowing the game down. Every run of the game is a session with its own id, and any number of
+sessions can be written to the same file.
+
+events table: session, time (seconds since 1970), kind ("start", "check", "solved" or "answers"), level (from 0), value
+
+usage: python telemetry.py [telemetry.db] [--json FILE]"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import threading
+import time
+import uuid
+from collections import deque
+
+
+SCHEMA = ["CREATE TABLE IF NOT EXISTS events (session TEXT, time REAL, kind TEXT, level INTEGER, value REAL)",
+          # every query of the summary reads this index in order instead of sorting the table
+          "CREATE INDEX IF NOT EXISTS events_by_kind ON events (kind, level, session, value)"]
+INSERT = "INSERT INTO events VALUES (?, ?, ?, ?, ?)"
+
+
+def connect(path):
+    """opens the telemetry file at path, making its table if it is new"""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = WAL") # the summary can be read while a game is writing
+    connection.execute("PRAGMA synchronous = NORMAL")
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.commit()
+    return connection
+
+
+class Telemetry:
+    """Class that buffers the events of one session and writes them to a SQLite file from a background thread"""
+    def __init__(self, path = "telemetry.db", capacity = 4096, flush_every = 1.0):
+        self.path = path
+        self.session = uuid.uuid4().hex
+        self.capacity = capacity # events held in memory at most, None for no limit
+        self.flush_every = flush_every # seconds between two writes
+        self.dropped = 0 # events lost because the buffer was full
+        self._buffer = deque(maxlen = capacity) # appending and popping from both ends is safe across threads
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target = self._write, name = "telemetry", daemon = True)
+        self._thread.start()
+
+    def record(self, kind, level, value = None):
+        """adds an event of the session to the buffer, it is written to the file by the next flush"""
+        if self.capacity is not None and len(self._buffer) == self.capacity:
+            self.dropped += 1
+        self._buffer.append((self.session, time.time(), kind, level, value))
+
+    def close(self):
+        """writes what is still buffered and stops the writer"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _write(self):
+        # runs on the writer thread, the connection is only ever used here
+        connection = connect(self.path)
+        closing = False
+        while not closing:
+            closing = self._stop.wait(self.flush_every)
+            batch = []
+            while self._buffer:
+                batch.append(self._buffer.popleft())
+            if batch:
+                with connection: # one transaction for the whole batch
+                    connection.executemany(INSERT, batch)
+        connection.close()
+
+
+def summarize(path):
+    """returns (number of sessions, list with a dictionary of numbers for every level played) for the file at path"""
+    connection = connect(path)
+    counts = {} # (kind, level) -> (events, sum of their values)
+    for kind, level, events, total in connection.execute("SELECT kind, level, COUNT(*), SUM(value) FROM events GROUP BY kind, level"):
+        counts[kind, level] = (events, total or 0)
+    players = {} # (kind, level) -> sessions with that event, a level can be started or its answers shown more than once
+    for kind, level, sessions in connection.execute("""SELECT kind, level, COUNT(DISTINCT session) FROM events
+                                                       WHERE kind IN ('start', 'answers') GROUP BY kind, level"""):
+        players[kind, level] = sessions
+    times = {}
+    for level, seconds in connection.execute("SELECT level, value FROM events WHERE kind = 'solved' ORDER BY level, value"):
+        times.setdefault(level, []).append(seconds)
+    sessions = connection.execute("SELECT COUNT(DISTINCT session) FROM events WHERE kind = 'start'").fetchone()[0]
+    connection.close()
+
+    levels = []
+    for level in sorted({level for _, level in counts}):
+        started = players.get(("start", level), 0)
+        answers = players.get(("answers", level), 0)
+        checks, cleared = counts.get(("check", level), (0, 0))
+        solved = counts.get(("solved", level), (0, 0))[0]
+        solve_times = times.get(level, [])
+        levels.append({"level": level, "started": started, "solved": solved,
+                       "checks": checks, "checks_per_solve": checks / solved if solved else None,
+                       "cleared_per_check": cleared / checks if checks else 0.0,
+                       "median_seconds": statistics.median(solve_times) if solve_times else None,
+                       "p90_seconds": solve_times[int(len(solve_times)*0.9)] if solve_times else None,
+                       "answers_shown": answers / started if started else 0.0})
+    return sessions, levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Sum up the telemetry of every session, level by level")
+    parser.add_argument("file", nargs = "?", default = "telemetry.db")
+    parser.add_argument("--json", metavar = "FILE", help = "also write the summary to FILE")
+    args = parser.parse_args()
+    if not os.path.exists(args.file):
+        print(f"{args.file} doesn't exist, play a game first")
+        return
+
+    start = time.perf_counter()
+    sessions, levels = summarize(args.file)
+    def seconds(value):
+        return "-" if value is None else f"{value:.1f}s"
+    print(f"{'level':>5} {'started':>8} {'solved':>7} {'median':>8} {'90%':>8} {'checks/solve':>13} {'cleared/check':>14} {'answers':>8}")
+    for level in levels:
+        checks = "-" if level["checks_per_solve"] is None else f"{level['checks_per_solve']:.2f}"
+        print(f"{level['level'] + 1:5} {level['started']:8} {level['solved']:7} {seconds(level['median_seconds']):>8} "
+              f"{seconds(level['p90_seconds']):>8} {checks:>13} {level['cleared_per_check']:14.2f} {level['answers_shown']:8.0%}")
+    print(f"{sessions} sessions summed up in {(time.perf_counter() - start)*1000:.1f}ms")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"sessions": sessions, "levels": levels}, file, indent = 4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Summary: Tests of the Board arrays and their copy on write copies, run with python -m pytest"""
+
+from board import Board, DEFAULT_COLOR
+
+
+def _board():
+    # a red path with its given letter "C" at the left end, the rest can be changed
+    return Board.from_cells([[("C", "Red", False, False), (" ", "Red", True, False), (" ", DEFAULT_COLOR, True, True)],
+                             [(" ", DEFAULT_COLOR, True, True), ("x", "Blue", True, True), (" ", DEFAULT_COLOR, True, True)]],
+                            "Animals")
+
+
+def _cells(board):
+    return [[(character.get_letter(), character.GetColor()) for character in row] for row in board.GetBoard()]
+
+
+def test_view_writes_go_to_the_board():
+    board = _board()
+    board.GetBoard()[1][2].SetLetter("A")
+    board.GetBoard()[1][2].SetColor("Red")
+    assert _cells(board)[1][2] == ("A", "Red")
+    assert board.differences(_board()) == [(1, 2)]
+    other = _board()
+    other.GetBoard()[1][2].SetLetter("a") # letters are compared in any case
+    other.GetBoard()[1][2].SetColor("Red")
+    assert board.matches(other)
+
+
+def test_copies_dont_share_changes():
+    board = _board()
+    first = board.copy()
+    second = board.copy()
+    first.GetBoard()[0][1].SetLetter("a")
+    second.GetBoard()[0][2].SetColor("Red")
+    assert _cells(board) == _cells(_board())
+    assert first.differences(board) == [(0, 1)]
+    assert second.differences(board) == [(0, 2)]
+    board.GetBoard()[1][0].SetColor("Blue")
+    assert first.differences(_board()) == [(0, 1)]
+
+
+def test_clear_keeps_the_cells_that_cant_be_changed():
+    board = _board()
+    played = board.copy()
+    played.GetBoard()[0][1].SetLetter("a")
+    played.GetBoard()[0][2].SetColor("Red")
+    played.clear()
+    assert _cells(played) == [[("C", "Red"), (" ", "Red"), (" ", DEFAULT_COLOR)],
+                              [(" ", DEFAULT_COLOR), (" ", DEFAULT_COLOR), (" ", DEFAULT_COLOR)]]
+    again = board.copy() # shares the cleared arrays made by the first clear
+    again.clear()
+    again.GetBoard()[0][1].SetLetter("b")
+    assert _cells(played)[0][1] == (" ", "Red")
+    assert _cells(board)[1][1] == ("x", "Blue")
+
+
+def test_clear_some_cells():
+    board = _board()
+    board.clear([(0, 0), (1, 1)])
+    assert _cells(board)[0][0] == ("C", "Red")
+    assert _cells(board)[1][1] == (" ", DEFAULT_COLOR)
@@ -0,0 +1,214 @@
+"""Summary: Tests of the engine's answer checking, run with python -m pytest"""
+
+from dictionary import NO_NODE, for_category
+from board import Board
+from engine import Engine, open_levels
+from journal import Journal, read_journal, restore, state_of
+from levelpack import LevelPack, write_pack
+from levelwatch import LevelWatcher
+from levels import CellRecord, LevelRecord, answer_of, read_answers, read_levels, write_json
+from paths import PathIndex
+
+
+def _engine(level):
+    engine = Engine(*open_levels())
+    engine.load_level(level)
+    return engine
+
+
+def _fill(engine, letters = True):
+    # puts the answer of the current level on its board, with or without its letters
+    answer = engine.answers[engine.current_level]
+    for i, row in enumerate(engine.board.GetBoard()):
+        for j, character in enumerate(row):
+            engine.set_color(i, j, answer[i][j][1])
+            if letters:
+                engine.set_letter(i, j, answer[i][j][0])
+
+
+def _editable_letters(engine):
+    return [(i, j) for i, row in enumerate(engine.board.GetBoard()) for j, character in enumerate(row) if character.get_has_text()]
+
+
+def test_answer_is_solved():
+    for level in range(1, 11):
+        engine = _engine(level)
+        _fill(engine)
+        assert engine.is_solved(), level
+
+
+def test_erased_cell_is_not_solved():
+    for level in range(1, 11):
+        engine = _engine(level)
+        _fill(engine)
+        i, j = _editable_letters(engine)[0]
+        engine.set_letter(i, j, "") # what backspace does
+        assert not engine.is_solved(), level
+
+
+def test_colors_without_letters_are_not_solved():
+    for level in range(1, 11):
+        engine = _engine(level)
+        _fill(engine, letters = False)
+        assert not engine.is_solved(), level
+
+
+def test_empty_letter_does_not_step():
+    dictionary = for_category("Companies")
+    assert dictionary.step(dictionary.root, "") == NO_NODE
+    assert dictionary.walk("c") != NO_NODE
+    assert dictionary.step(dictionary.walk("c"), "") == NO_NODE
+    assert "cat" in dictionary
+
+
+def _word_row(word, color):
+    # a path along a row, its first letter given
+    return (CellRecord(word[0].upper(), color, False, False),) + tuple(CellRecord(" ", color, True, False) for _ in word[1:])
+
+
+def _three_rows():
+    # red "cat" along the top, blue "dog" along the bottom and an empty row between them, filled in but for that row
+    blank = tuple(CellRecord(" ", "Default", True, True) for _ in range(3))
+    level = LevelRecord("Animals", (_word_row("cat", "Red"), blank, _word_row("dog", "Blue")))
+    answer = answer_of((_word_row("cat", "Red"), blank, _word_row("dog", "Blue")))
+    engine = Engine([level], [answer])
+    engine.load_level(0)
+    for i, word in ((0, "cat"), (2, "dog")):
+        for j in range(1, 3):
+            engine.set_letter(i, j, word[j])
+    return engine
+
+
+def test_color_without_ends_does_not_fill_the_board():
+    engine = _three_rows()
+    for j in range(3):
+        engine.set_color(1, j, "Green")
+    assert not engine.paths.is_full()
+    assert not engine.is_solved()
+    assert engine.check() != (True, [])
+
+
+def test_loop_apart_from_the_path_is_not_complete():
+    # a red path along the top and a red 2x2 block that isn't connected to it, as many pairs as a single path would have
+    red, blank = ("a", "Red", True, True), (" ", "Default", True, True)
+    end = ("a", "Red", False, False)
+    cells = [[end, red, end, blank, blank],
+             [blank, blank, blank, red, red],
+             [blank, blank, blank, red, red]]
+    paths = PathIndex(Board.from_cells(cells))
+    assert paths.path("Red") is None
+    assert not paths.is_complete("Red")
+    assert "Red" not in paths.complete_colors()
+
+
+def test_json_keeps_categories(tmp_path):
+    levels, answers = open_levels()
+    levels = [level._replace(category = "Food") for level in levels[:3]]
+    write_json(levels, answers[:3], tmp_path / "grid.json", tmp_path / "answers.json")
+    assert read_levels(tmp_path / "grid.json") == levels
+    assert read_answers(tmp_path / "answers.json") == answers[:3]
+
+
+def _watched(tmp_path, count):
+    # writes the first count built in levels to json files and returns a LevelWatcher of them
+    levels, answers = open_levels()
+    write_json(levels[:count], answers[:count], tmp_path / "grid.json", tmp_path / "answers.json")
+    return LevelWatcher(str(tmp_path / "grid.json"), str(tmp_path / "answers.json"))
+
+
+def _rewrite(tmp_path, watcher, count):
+    levels, answers = open_levels()
+    write_json(levels[:count], answers[:count], tmp_path / "grid.json", tmp_path / "answers.json")
+    assert watcher.check()
+    return watcher.take()
+
+
+def test_reload_without_the_level_being_played(tmp_path):
+    watcher = _watched(tmp_path, 4)
+    engine = Engine(watcher.levels, watcher.answers)
+    engine.load_level(3)
+    assert engine.replace_levels(*_rewrite(tmp_path, watcher, 3))
+    assert engine.last_level == 3
+
+
+def test_reload_keeps_a_finished_game_finished(tmp_path):
+    watcher = _watched(tmp_path, 3)
+    engine = Engine(watcher.levels, watcher.answers)
+    engine.load_level(2)
+    engine.advance()
+    assert engine.is_finished()
+    assert not engine.replace_levels(*_rewrite(tmp_path, watcher, 5))
+    assert engine.is_finished() and engine.current_level == 5
+
+
+def _cells_of(engine):
+    return [[(character.get_letter(), character.GetColor()) for character in row] for row in engine.board.GetBoard()]
+
+
+def _play(engine):
+    # fills in the answer of the first three cells that can be changed, one change per call
+    answer = engine.answers[engine.current_level]
+    for i, j in _editable_letters(engine)[:3]:
+        engine.set_color(i, j, answer[i][j][1])
+        engine.set_letter(i, j, answer[i][j][0])
+
+
+def test_undo_takes_back_a_reset():
+    engine = _engine(1)
+    start = _cells_of(engine)
+    _play(engine)
+    played = _cells_of(engine)
+    cells = _editable_letters(engine)[:3]
+    engine.reset(cells)
+    assert _cells_of(engine) != played
+    assert set(engine.undo()) == set(cells) # the whole reset is one change
+    assert _cells_of(engine) == played
+    engine.redo()
+    assert _cells_of(engine) != played
+    while engine.undo():
+        pass
+    assert _cells_of(engine) == start
+
+
+def test_a_new_change_drops_the_redo_steps():
+    engine = _engine(1)
+    _play(engine)
+    engine.undo()
+    assert engine.redo_steps
+    i, j = _editable_letters(engine)[-1]
+    engine.set_letter(i, j, "z")
+    assert not engine.redo_steps
+    assert engine.redo() == []
+
+
+def test_restore_gives_the_same_board():
+    engine = _engine(2)
+    _play(engine)
+    other = Engine(*open_levels())
+    assert restore(other, state_of(engine))
+    assert other.current_level == 2
+    assert _cells_of(other) == _cells_of(engine)
+
+
+def test_journal_keeps_the_progress(tmp_path):
+    path = str(tmp_path / "progress.journal")
+    engine = Engine(*open_levels())
+    journal = Journal(path)
+    assert not journal.resume(engine)
+    engine.load_level(3)
+    _play(engine)
+    journal.close()
+    other = Engine(*open_levels())
+    assert restore(other, read_journal(path))
+    assert other.current_level == 3
+    assert _cells_of(other) == _cells_of(engine)
+
+
+def test_level_pack_reads_back_the_json_levels(tmp_path):
+    levels, answers = read_levels("grid.json"), read_answers("answers.json")
+    path = str(tmp_path / "levels.wfp")
+    write_pack(path, levels, answers)
+    pack = LevelPack(path)
+    assert list(pack.levels) == levels
+    assert list(pack.answers) == answers
+    pack.close()
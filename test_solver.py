@@ -0,0 +1,81 @@
+"""Summary: Tests of the path solver against a brute force search on small random grids, run with python -m pytest"""
+
+import random
+
+from board import Board, DEFAULT_COLOR
+from solver import find_endpoints, solve
+
+
+def _random_board(rng):
+    # a grid of 2 to 4 rows and columns with the ends of 1 to 3 colors in random cells
+    rows, columns = rng.randint(2, 4), rng.randint(2, 4)
+    colors = ["Red", "Green", "Blue"][:rng.randint(1, min(3, rows*columns//2))]
+    cells = [[(" ", DEFAULT_COLOR, True, True) for _ in range(columns)] for _ in range(rows)]
+    places = rng.sample([(i, j) for i in range(rows) for j in range(columns)], 2*len(colors))
+    for color, start, end in zip(colors, places[::2], places[1::2]):
+        cells[start[0]][start[1]] = ("A", color, False, False)
+        cells[end[0]][end[1]] = (" ", color, True, False)
+    return Board.from_cells(cells)
+
+
+def _brute_force(board, fill, touching):
+    # every solution as a set of (color, path), trying every path of every color in turn
+    rows, columns = board.size()
+    ends = find_endpoints(board)
+    colors = sorted(ends)
+    solutions = []
+
+    def neighbors(cell):
+        i, j = cell
+        return [(i2, j2) for i2, j2 in ((i-1, j), (i+1, j), (i, j-1), (i, j+1)) if 0 <= i2 < rows and 0 <= j2 < columns]
+
+    def paths(path, end, used):
+        if path[-1] == end:
+            yield list(path)
+            return
+        for cell in neighbors(path[-1]):
+            if cell in used or cell in path:
+                continue
+            if not touching and any(other in path for other in neighbors(cell) if other != path[-1]):
+                continue
+            path.append(cell)
+            yield from paths(path, end, used)
+            path.pop()
+
+    def search(index, used, chosen):
+        if index == len(colors):
+            if not fill or len(used) == rows*columns:
+                solutions.append(frozenset(chosen))
+            return
+        color = colors[index]
+        start, end = ends[color]
+        others = used - {start, end}
+        for path in paths([start], end, others):
+            search(index + 1, used | set(path), chosen + [(color, tuple(path))])
+
+    search(0, {cell for pair in ends.values() for cell in pair}, [])
+    return solutions
+
+
+def _layout(paths, rows, columns):
+    grid = [[DEFAULT_COLOR] * columns for _ in range(rows)]
+    for color, path in paths:
+        for i, j in path:
+            grid[i][j] = color
+    return tuple(tuple(row) for row in grid)
+
+
+def test_solver_matches_brute_force():
+    # a solution is a layout of the colors, paths that touch themselves can lay out the same cells in more than one order
+    rng = random.Random(8)
+    for case in range(300):
+        board = _random_board(rng)
+        fill, touching = rng.random() < 0.7, rng.random() < 0.5
+        expected = _brute_force(board, fill, touching)
+        solutions = solve(board, None, fill, touching)
+        layouts = [solution.colors() for solution in solutions]
+        assert len(layouts) == len(set(layouts)), case
+        assert set(layouts) == {_layout(paths, *board.size()) for paths in expected}, case
+        for solution in solutions: # and the paths given are real paths
+            assert frozenset((color, tuple(path)) for color, path in solution.paths.items()) in expected, case
+        assert len(solve(board, 2, fill, touching)) == min(2, len(layouts)), case
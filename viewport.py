@@ -0,0 +1,118 @@
+"""Summary: This file contains the class Viewport which decides where the cells of a level's grid are on the screen.
+The grid is drawn inside a fixed area of the window. A grid that fits the area is shown whole and centered in it, a
+bigger one is shown at the biggest zoom that keeps the cells readable and can be scrolled, so only the cells that
+overlap the area are drawn and clicked, however big the level is. The zoom is one of a few fixed scales of the key
+images, so every cell image is scaled once per zoom and shared (see AssetCache.scaled).
+Cell (i, j) is drawn i cells across and j cells down, the way the levels have always been laid out."""
+
+import pygame
+
+
+ZOOMS = (0.1, 0.125, 0.15, 0.2, 0.25, 0.3, 0.4) # scales of the key images the grid can be drawn at, 0.4 is full size
+FIT_ZOOM = 0.2 # grids bigger than the area are drawn at least this big, and scrolled
+
+
+class Viewport:
+    """Class with the area of the screen the grid is drawn in, its zoom and how far it is scrolled"""
+    def __init__(self, area, size, cell_size, padding = 2, zooms = ZOOMS):
+        self.area = pygame.Rect(area)
+        self.size = size # (cells across, cells down)
+        self.cell_size = cell_size # (width, height) of a key image before it is scaled
+        self.padding = padding # space between cells, in pixels
+        self.zooms = zooms
+        self.offset = [0, 0] # pixels of the grid scrolled out of the area to the left and to the top
+        self.version = 0 # changes every time the cells move on the screen
+        self.zoom_index = self._fitting_zoom()
+        self._clamp()
+
+    @property
+    def zoom(self):
+        return self.zooms[self.zoom_index]
+
+    def cell_width(self):
+        return int(self.cell_size[0]*self.zoom)
+
+    def cell_height(self):
+        return int(self.cell_size[1]*self.zoom)
+
+    def pitch(self):
+        """returns the distance in pixels from a cell to the next one, across and down"""
+        return self.cell_width() + self.padding, self.cell_height() + self.padding
+
+    def grid_size(self):
+        """returns the (width, height) of the whole grid at the current zoom"""
+        pitch_x, pitch_y = self.pitch()
+        return self.size[0]*pitch_x + self.padding, self.size[1]*pitch_y + self.padding
+
+    def _fitting_zoom(self):
+        # the biggest zoom that shows the whole grid, down to FIT_ZOOM, the player can zoom out further by hand
+        readable = [index for index, zoom in enumerate(self.zooms) if zoom >= FIT_ZOOM] or [len(self.zooms) - 1]
+        for index in reversed(readable):
+            self.zoom_index = index
+            width, height = self.grid_size()
+            if width <= self.area.width and height <= self.area.height:
+                return index
+        return readable[0]
+
+    def _origin(self):
+        # screen position of the top left corner of the grid, a grid smaller than the area is centered in it
+        width, height = self.grid_size()
+        x = self.area.x + (self.area.width - width)//2 if width <= self.area.width else self.area.x - self.offset[0]
+        y = self.area.y + (self.area.height - height)//2 if height <= self.area.height else self.area.y - self.offset[1]
+        return x, y
+
+    def _clamp(self):
+        # keeps the grid covering the area, it can't be scrolled past its edges
+        width, height = self.grid_size()
+        self.offset[0] = max(0, min(self.offset[0], width - self.area.width))
+        self.offset[1] = max(0, min(self.offset[1], height - self.area.height))
+
+    def cell_position(self, i, j):
+        """returns the screen position of the top left corner of cell (i, j)"""
+        x, y = self._origin()
+        pitch_x, pitch_y = self.pitch()
+        return x + self.padding + i*pitch_x, y + self.padding + j*pitch_y
+
+    def visible_cells(self):
+        """returns the (i, j) of every cell that overlaps the area"""
+        return [cell for cell, _ in self.placed_cells()]
+
+    def placed_cells(self):
+        """returns ((i, j), screen position of the top left corner) for every cell that overlaps the area"""
+        x, y = self._origin()
+        x += self.padding
+        y += self.padding
+        pitch_x, pitch_y = self.pitch()
+        first_i = max(0, (self.area.left - x)//pitch_x)
+        last_i = min(self.size[0] - 1, (self.area.right - 1 - x)//pitch_x)
+        first_j = max(0, (self.area.top - y)//pitch_y)
+        last_j = min(self.size[1] - 1, (self.area.bottom - 1 - y)//pitch_y)
+        return [((i, j), (x + i*pitch_x, y + j*pitch_y)) for i in range(first_i, last_i + 1) for j in range(first_j, last_j + 1)]
+
+    def scroll(self, dx, dy):
+        """moves the grid dx pixels to the left and dy pixels up, returns True if it moved"""
+        before = tuple(self.offset)
+        self.offset[0] += dx
+        self.offset[1] += dy
+        self._clamp()
+        if tuple(self.offset) == before:
+            return False
+        self.version += 1
+        return True
+
+    def set_zoom(self, index, around = None):
+        """changes to the zoom self.zooms[index], keeping the point of the grid under the screen position around
+        (the center of the area by default) where it is. Returns True if the zoom changed"""
+        index = max(0, min(index, len(self.zooms) - 1))
+        if index == self.zoom_index:
+            return False
+        around = around if around is not None else self.area.center
+        origin = self._origin()
+        pitch = self.pitch()
+        point = [(around[0] - origin[0]) / pitch[0], (around[1] - origin[1]) / pitch[1]] # in cells
+        self.zoom_index = index
+        pitch = self.pitch()
+        self.offset = [int(point[0]*pitch[0]) - (around[0] - self.area.x), int(point[1]*pitch[1]) - (around[1] - self.area.y)]
+        self._clamp()
+        self.version += 1
+        return True